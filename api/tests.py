@@ -1,3 +1,82 @@
-from django.test import TestCase
+from datetime import time
+from types import SimpleNamespace
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+from calendly.routers import PrimaryReplicaRouter, replica_reads, use_replicas
+from meeting.models import Meeting
+from schedule.cache import bump_meeting_version
+from schedule.models import Days, Time
+from schedule.tests import LOCMEM_CACHES
 
-# Create your tests here.
+
+class RequestMetricsMiddlewareTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="host", password="pass")
+        day = Days.objects.create(user=self.user, is_repeating=True, available_repeating_days="monday")
+        Time.objects.create(day=day, start_time=time(0, 0), end_time=time(9, 0))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_server_timing_and_log_line(self):
+        with self.assertLogs("calendly.requests", "INFO") as logs:
+            response = self.client.get(f"/api/schedule/daily/open/{self.user.id}", {"date": "2030-01-07"})
+        self.assertRegex(response["Server-Timing"], r'^db;dur=[\d.]+;desc="\d+ queries", total;dur=[\d.]+$')
+        self.assertEqual(len(logs.records), 1)
+        record = logs.records[0]
+        self.assertEqual(record.url_name, "daily-open")
+        self.assertEqual(record.status, 200)
+        self.assertGreater(record.queries, 0)
+        self.assertIn("url_name=daily-open", record.getMessage())
+
+    @override_settings(REQUEST_METRICS_SLOW_QUERY_MS=0)
+    def test_slow_queries_are_logged_with_origin(self):
+        with self.assertLogs("calendly.requests", "WARNING") as logs:
+            self.client.get(f"/api/schedule/daily/open/{self.user.id}", {"date": "2030-01-07"})
+        self.assertTrue(logs.records)
+        self.assertTrue(any(record.origin.startswith("schedule/") for record in logs.records))
+
+
+@override_settings(DATABASE_REPLICAS=["replica1"])
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.router = PrimaryReplicaRouter()
+        self.request = SimpleNamespace(user=SimpleNamespace(id=1))
+
+        @replica_reads()
+        def view(request):
+            return self.router.db_for_read(Meeting)
+
+        self.view = view
+
+    def test_reads_outside_replica_views_use_primary(self):
+        self.assertEqual(self.router.db_for_read(Meeting), "default")
+        self.assertEqual(self.router.db_for_write(Meeting), "default")
+
+    def test_replica_views_read_from_replica(self):
+        self.assertEqual(self.view(self.request), "replica1")
+        self.assertEqual(self.router.db_for_read(Meeting), "default")
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_writes_pin_the_user_to_primary(self):
+        bump_meeting_version(1)
+        self.assertEqual(self.view(self.request), "default")
+        self.assertEqual(self.view(SimpleNamespace(user=SimpleNamespace(id=2))), "replica1")
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate("replica1", "meeting"))
+        self.assertTrue(self.router.allow_migrate("default", "meeting"))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_uses_primary(self):
+        self.assertEqual(self.view(self.request), "default")
+
+
+@override_settings(DATABASE_REPLICAS=["replica1"])
+class PrimaryReplicaTransactionTests(TestCase):
+    def test_open_transactions_stay_on_primary(self):
+        # TestCase wraps every test in a transaction on the primary.
+        with use_replicas():
+            self.assertEqual(PrimaryReplicaRouter().db_for_read(Meeting), "default")
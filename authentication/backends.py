@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTTokenUserAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from .serializer import UserInfoSerializer
+
+USER_CACHE_TIMEOUT = getattr(settings, "USER_CACHE_TIMEOUT", 60)
+
+
+class IntTokenUser(TokenUser):
+    """
+    TokenUser whose ``id`` is the integer primary key rather than the raw
+    claim string, so ids from the token key the same dicts, filters and cache
+    entries as ``User.id``.
+    """
+
+    @cached_property
+    def id(self):
+        return int(self.token[api_settings.USER_ID_CLAIM])
+
+
+class StatelessJWTAuthentication(JWTTokenUserAuthentication):
+    """
+    Validates the access token like JWTAuthentication but builds request.user
+    from the token claims (an IntTokenUser) instead of loading the
+    auth_user row. Views behind it should only rely on ``request.user.id``;
+    use ``get_cached_user_info`` when profile fields are needed.
+
+    A user deactivated after the token was issued stays authenticated until
+    the token expires.
+    """
+
+
+def get_cached_user_info(user_id):
+    """
+    Return ``UserInfoSerializer`` data for ``user_id``, served from the cache
+    for USER_CACHE_TIMEOUT seconds. Only the serialized fields are cached,
+    never the model with its password hash.
+    """
+    key = f"auth:user-info:{user_id}"
+    info = cache.get(key)
+    if info is None:
+        info = dict(UserInfoSerializer(User.objects.get(id=user_id)).data)
+        cache.set(key, info, USER_CACHE_TIMEOUT)
+    return info
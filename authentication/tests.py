@@ -1,3 +1,72 @@
-from django.test import TestCase
+from datetime import date, time
+from unittest import mock
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from meeting.models import Meeting
+from schedule.tests import LOCMEM_CACHES, create_weekly_schedule
+from .backends import StatelessJWTAuthentication
 
-# Create your tests here.
+
+class StatelessJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="host", password="pass", email="host@example.com")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+
+    def test_stateless_class_skips_user_lookup(self):
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+        with self.assertNumQueries(0):
+            user, _ = StatelessJWTAuthentication().authenticate(request)
+        self.assertEqual(user.id, self.user.id)
+
+    def test_views_work_with_stateless_users(self):
+        create_weekly_schedule(self.user)
+        Meeting.objects.create(user=self.user, day=date(2030, 1, 7), start_time=time(10), end_time=time(11), active=True)
+        urls = [
+            "/api/schedule/daily?date=2030-01-07",
+            "/api/schedule/monthly?year=2030&month=1",
+            "/api/meeting/",
+            "/api/meeting/export",
+        ]
+        for url in urls:
+            view = resolve(url.split("?")[0]).func.cls
+            with mock.patch.object(view, "authentication_classes", [StatelessJWTAuthentication]):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertFalse([q for q in queries if 'FROM "auth_user"' in q["sql"]], url)
+            if url.startswith("/api/schedule/daily"):
+                self.assertEqual(response.json()["time_slots"], [
+                    {"start_time": "09:00:00", "end_time": "10:00:00"},
+                    {"start_time": "11:00:00", "end_time": "17:00:00"},
+                ])
+
+    def test_default_authentication_loads_the_user(self):
+        self.assertFalse(settings.JWT_STATELESS_AUTH)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get("/api/meeting/").status_code, 401)
+
+    def test_rejects_bad_token(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer nope")
+        self.assertEqual(self.client.get("/api/meeting/").status_code, 401)
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_token_refresh_caches_user(self):
+        refresh = str(RefreshToken.for_user(self.user))
+        self.client.credentials()
+        self.client.post("/api/auth/token/refresh", {"refresh_token": refresh}, format="json")
+        with self.assertNumQueries(0):
+            data = self.client.post("/api/auth/token/refresh", {"refresh_token": refresh}, format="json").json()
+        self.assertEqual(data["user_object"]["email"], "host@example.com")
+        cached = cache.get(f"auth:user-info:{self.user.id}")
+        self.assertIsInstance(cached, dict)
+        self.assertNotIn("password", cached)
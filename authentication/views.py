@@ -10,6 +10,7 @@ from django.contrib.auth.hashers import check_password
 from .serializer import RegistrationSerializers
 from .serializer import LoginSerializer
 from .serializer import UserInfoSerializer
+from .backends import get_cached_user_info
 from django.contrib.auth.models import User
 from django.contrib.auth.base_user import BaseUserManager
 from django.contrib.auth.hashers import make_password
@@ -104,7 +105,7 @@ def tokenRefresh(request):
             'token_type': str(refresh.payload['token_type']),
             'expiry': refresh.payload['exp'],
             'user_id': refresh.payload['user_id'],
-            'user_object': UserInfoSerializer(User.objects.get(id=refresh.payload['user_id'])).data,
+            'user_object': get_cached_user_info(refresh.payload['user_id']),
 
         })
     except Exception as e:
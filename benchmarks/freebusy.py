@@ -0,0 +1,102 @@
+"""
+Benchmark FreeBusyIndex overlap queries against a linear scan of the same meetings.
+
+    python -m benchmarks.freebusy --sizes 100,1000,10000 --queries 2000 --output freebusy.json
+
+For each size a host's meetings are generated over a year (30-90 minute
+meetings during working hours), then the same random windows are checked
+with the index and with a plain scan.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from benchmarks.run import git_commit, setup_django
+
+
+def synthetic_meetings(count, rng):
+    meetings = []
+    for meeting_id in range(count):
+        start = rng.randrange(365) * 1440 + rng.randrange(8 * 60, 17 * 60, 15)
+        meetings.append((start, start + rng.choice((30, 45, 60, 90)), meeting_id))
+    return meetings
+
+
+def linear_overlapping(meetings, start, end):
+    return sorted(meeting_id for meeting_start, meeting_end, meeting_id in meetings if meeting_start < end and meeting_end > start)
+
+
+def timed(func, windows):
+    started = time.perf_counter()
+    for start, end in windows:
+        func(start, end)
+    return (time.perf_counter() - started) / len(windows) * 1e6
+
+
+def run(sizes, queries, seed=0):
+    from meeting.freebusy import FreeBusyIndex
+
+    rng = random.Random(seed)
+    results = []
+    for size in sizes:
+        meetings = synthetic_meetings(size, rng)
+        windows = []
+        for _ in range(queries):
+            start = rng.randrange(365 * 1440)
+            windows.append((start, start + rng.choice((15, 30, 60, 240))))
+
+        started = time.perf_counter()
+        index = FreeBusyIndex(meetings)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        for start, end in windows[:50]:
+            assert sorted(index.overlapping(start, end)) == linear_overlapping(meetings, start, end)
+
+        result = {
+            "meetings": size,
+            "queries": queries,
+            "build_ms": round(build_ms, 3),
+            "index_overlapping_us": round(timed(index.overlapping, windows), 3),
+            "index_is_free_us": round(timed(index.is_free, windows), 3),
+            "linear_overlapping_us": round(timed(lambda s, e: linear_overlapping(meetings, s, e), windows), 3),
+        }
+        results.append(result)
+        print(
+            f"{size:>7} meetings  index {result['index_overlapping_us']:>8.2f} us  "
+            f"is_free {result['index_is_free_us']:>6.2f} us  linear {result['linear_overlapping_us']:>10.2f} us",
+            file=sys.stderr,
+        )
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100,1000,10000", help="comma separated meeting counts")
+    parser.add_argument("--queries", type=int, default=2000, help="windows checked per size")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(os.path.join(tmp, "benchmark.sqlite3"))
+        results = run([int(size) for size in args.sizes.split(",")], args.queries)
+
+    report = {
+        "commit": git_commit(),
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
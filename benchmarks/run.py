@@ -0,0 +1,227 @@
+"""
+Benchmark the schedule and meeting endpoints against a seeded SQLite database.
+
+    python -m benchmarks.run --sizes 10,100,500 --repeat 20 --output bench.json
+
+For every data size the database is flushed and re-seeded with that many
+hosts, then each endpoint is called ``--repeat`` times and its latency and SQL
+query count are recorded. The JSON written to ``--output`` is meant to be
+diffed between commits.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, time as dt_time, timedelta
+
+
+def setup_django(db_path):
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    # The benchmark is one process, so a local cache is shared by every request and --warm means something.
+    os.environ.setdefault("CACHE_URL", "locmemcache://")
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "calendly.settings")
+    import django
+    django.setup()
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class Context:
+    """Per-size fixtures: the seeded hosts plus a bookable host and pending meetings to approve."""
+
+    def __init__(self, users, repeat):
+        from django.contrib.auth.models import User
+        from meeting.models import Meeting
+        from schedule.models import Days
+
+        self.users = users
+        self.host = users[0]
+        self.start = date.today() + timedelta(days=1)
+        self.month = self.start + timedelta(days=31)
+
+        self.open_host = User.objects.create(username=f"bench-open-{len(users)}")
+        for day_name in ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"):
+            Days.objects.create(user=self.open_host, is_repeating=True, available_repeating_days=day_name)
+        self.open_day = self.start + timedelta(days=400)
+
+        self.pending = []
+        for i in range(repeat):
+            meeting = Meeting.objects.create(
+                user=self.host, name="Pending", email="pending@example.com", active=False,
+                day=self.start + timedelta(days=200 + i), start_time=dt_time(10, 0), end_time=dt_time(10, 30),
+            )
+            self.pending.append(meeting.id)
+
+    def user(self, i):
+        return self.users[i % len(self.users)]
+
+
+def cases():
+    def daily(ctx, i):
+        return ctx.user(i), "get", "/api/schedule/daily", {"date": str(ctx.start + timedelta(days=i % 28))}
+
+    def monthly(ctx, i):
+        return ctx.user(i), "get", "/api/schedule/monthly", {"year": ctx.month.year, "month": ctx.month.month}
+
+    def daily_open(ctx, i):
+        return ctx.host, "get", f"/api/schedule/daily/open/{ctx.user(i).id}", {"date": str(ctx.start + timedelta(days=i % 28))}
+
+    def monthly_open(ctx, i):
+        return ctx.host, "get", f"/api/schedule/monthly/open/{ctx.user(i).id}", {"year": ctx.month.year, "month": ctx.month.month}
+
+    def create_schedule(ctx, i):
+        payload = {
+            "repeating_days": [{"day": d, "start_time": "09:00", "end_time": "17:00"} for d in ("monday", "tuesday", "wednesday", "thursday", "friday")],
+            "specific_days": [
+                {"date": str(ctx.start + timedelta(days=d)), "times": [{"start_time": "10:00", "end_time": "14:00"}]}
+                for d in range(0, 90, 3)
+            ],
+        }
+        return ctx.user(i), "post", "/api/schedule/create", payload
+
+    def edit_schedule(ctx, i):
+        payload = {
+            "specific_unavailable": [
+                {"date": str(ctx.start + timedelta(days=d)), "times": [{"start_time": "12:00", "end_time": "12:30"}]}
+                for d in range(10)
+            ],
+        }
+        return ctx.user(i), "patch", "/api/schedule/edit", payload
+
+    def meeting_create(ctx, i):
+        minute = (i % 100) * 10
+        payload = {
+            "id": ctx.open_host.id, "name": "Guest", "email": "guest@example.com", "subject": "Benchmark",
+            "day": str(ctx.open_day + timedelta(days=i // 100)),
+            "start_time": f"{minute // 60 + 6:02d}:{minute % 60:02d}",
+            "end_time": f"{(minute + 10) // 60 + 6:02d}:{(minute + 10) % 60:02d}",
+        }
+        return None, "post", "/api/meeting/create", payload
+
+    def meeting_toggle(ctx, i):
+        return ctx.host, "get", f"/api/meeting/toggle/{ctx.pending[i]}", None
+
+    return [
+        ("getDailySchedule", daily),
+        ("getMonthlySchedule", monthly),
+        ("getDailyScheduleOpen", daily_open),
+        ("getMonthlyScheduleOpen", monthly_open),
+        ("createSchedule", create_schedule),
+        ("editSchedule", edit_schedule),
+        ("meetingCreate", meeting_create),
+        ("meetingToggle", meeting_toggle),
+    ]
+
+
+def measure(ctx, name, build, repeat, warm):
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework.test import APIClient
+
+    timings, query_counts, errors = [], [], 0
+    for i in range(repeat):
+        user, method, url, payload = build(ctx, i)
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        if not warm:
+            cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = getattr(client, method)(url, payload, format="json" if method != "get" else None)
+            elapsed = time.perf_counter() - started
+        body = response.json() if response.get("Content-Type", "").startswith("application/json") else {}
+        if response.status_code >= 400 or body.get("code", 200) >= 400:
+            errors += 1
+        timings.append(elapsed * 1000)
+        query_counts.append(len(queries))
+
+    return {
+        "endpoint": name,
+        "iterations": repeat,
+        "errors": errors,
+        "median_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+        "min_ms": round(min(timings), 3),
+        "queries_median": statistics.median(query_counts),
+        "queries_max": max(query_counts),
+    }
+
+
+def run(sizes, repeat, warm, only=None):
+    from django.core.management import call_command
+    from benchmarks.seed import seed
+
+    call_command("migrate", verbosity=0)
+    results = []
+    for size in sizes:
+        call_command("flush", interactive=False, verbosity=0)
+        started = time.perf_counter()
+        ctx = Context(seed(size), repeat)
+        seed_seconds = time.perf_counter() - started
+        for name, build in cases():
+            if only and name not in only:
+                continue
+            result = measure(ctx, name, build, repeat, warm)
+            result.update(size=size, seed_seconds=round(seed_seconds, 3))
+            results.append(result)
+            print(f"{size:>6} {name:<24} {result['median_ms']:>9.2f} ms  {result['queries_median']:>5} queries", file=sys.stderr)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10,100", help="comma separated numbers of seeded hosts")
+    parser.add_argument("--repeat", type=int, default=20, help="calls per endpoint and size")
+    parser.add_argument("--warm", action="store_true", help="keep the availability cache between calls")
+    parser.add_argument("--only", help="comma separated endpoint names to run")
+    parser.add_argument("--database", help="SQLite file to use (defaults to a temporary file)")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(args.database or os.path.join(tmp, "benchmark.sqlite3"))
+        import django
+        results = run(
+            [int(size) for size in args.sizes.split(",")],
+            args.repeat,
+            args.warm,
+            set(args.only.split(",")) if args.only else None,
+        )
+
+    report = {
+        "commit": git_commit(),
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": "sqlite",
+        "repeat": args.repeat,
+        "warm_cache": args.warm,
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
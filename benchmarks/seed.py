@@ -0,0 +1,73 @@
+import random
+from datetime import date, time, timedelta
+from django.contrib.auth.models import User
+from django.contrib.auth.hashers import make_password
+from meeting.models import Meeting
+from schedule.intervals import DayMask
+from schedule.models import Days, Time, WEEKDAY_MAP, weekday_bits
+
+WORK_STARTS = (time(7, 0), time(8, 0), time(9, 0), time(10, 0))
+WORK_ENDS = (time(15, 0), time(16, 0), time(17, 0), time(18, 0))
+
+
+def _unavailable(available):
+    return (~DayMask.from_times(available)).time_intervals()
+
+
+def seed(num_users, specific_days=30, meetings=40, horizon_days=90, start=None, rng=None):
+    """
+    Create ``num_users`` hosts, each with a Monday-Friday (sometimes Saturday)
+    repeating schedule, ``specific_days`` overrides and ``meetings`` meetings
+    spread over the next ``horizon_days`` days. Returns the created users.
+    """
+    rng = rng or random.Random(0)
+    start = start or date.today() + timedelta(days=1)
+    password = make_password("benchmark")
+    offset = User.objects.count()
+    users = User.objects.bulk_create([
+        User(username=f"bench{offset + i}", email=f"bench{offset + i}@example.com", password=password)
+        for i in range(num_users)
+    ])
+    if users[0].pk is None:
+        users = list(User.objects.filter(username__startswith="bench").order_by("id")[offset:offset + num_users])
+
+    days, day_windows = [], []
+    for user in users:
+        weekdays = list(WEEKDAY_MAP)[:5] + (["saturday"] if rng.random() < 0.2 else [])
+        for day_name in WEEKDAY_MAP:
+            day_name = day_name if day_name in weekdays else ""
+            days.append(Days(user=user, is_repeating=True, available_repeating_days=day_name, weekdays=weekday_bits(day_name)))
+            day_windows.append(_unavailable([(rng.choice(WORK_STARTS), rng.choice(WORK_ENDS))]) if day_name else [])
+
+        for offset_days in rng.sample(range(horizon_days), min(specific_days, horizon_days)):
+            if rng.random() < 0.3:
+                windows = [(time(0, 0), time(23, 59))]
+            else:
+                windows = _unavailable([(time(rng.randint(7, 11), 0), time(rng.randint(13, 19), 0))])
+            days.append(Days(user=user, is_repeating=False, day=start + timedelta(days=offset_days)))
+            day_windows.append(windows)
+
+    Days.objects.bulk_create(days, batch_size=1000)
+    if days[0].pk is None:
+        days = list(Days.objects.filter(user__in=users).order_by("id"))
+    Time.objects.bulk_create(
+        [Time(day=day, start_time=s, end_time=e) for day, windows in zip(days, day_windows) for s, e in windows],
+        batch_size=1000,
+    )
+
+    rows = []
+    for user in users:
+        for n in range(meetings):
+            hour, minute = rng.randint(9, 15), rng.choice((0, 30))
+            rows.append(Meeting(
+                user=user,
+                name=f"Guest {n}",
+                email=f"guest{n}@example.com",
+                subject="Benchmark",
+                day=start + timedelta(days=rng.randrange(horizon_days)),
+                start_time=time(hour, minute),
+                end_time=time(hour, minute + 29),
+                active=rng.random() < 0.5,
+            ))
+    Meeting.objects.bulk_create(rows, batch_size=1000)
+    return users
@@ -0,0 +1,99 @@
+import logging
+import os
+import time
+import traceback
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("calendly.requests")
+
+_THIS_FILE = os.path.abspath(__file__)
+
+
+def _query_origin():
+    """The innermost project frame (file:line in function) that issued the current query."""
+    base_dir = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack()):
+        filename = os.path.abspath(frame.filename)
+        if filename == _THIS_FILE or not filename.startswith(base_dir) or "site-packages" in filename:
+            continue
+        return f"{os.path.relpath(filename, base_dir)}:{frame.lineno} in {frame.name}"
+    return "unknown"
+
+
+class QueryRecorder:
+    def __init__(self, slow_query_ms=None):
+        self.slow_query_ms = slow_query_ms
+        self.count = 0
+        self.duration = 0.0
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+            if self.slow_query_ms is not None and elapsed * 1000 >= self.slow_query_ms:
+                self.slow.append((elapsed, sql, _query_origin()))
+
+
+class RequestMetricsMiddleware:
+    """
+    Count the SQL queries and time spent in the database and in the whole
+    request, then report them in a Server-Timing header and one log line per
+    request keyed by the URL name.
+
+    With REQUEST_METRICS_SLOW_QUERY_MS set, every query at least that slow is
+    logged as a warning together with the project frame that issued it.
+    Queries run while a streaming response is being consumed happen after
+    this middleware returns and are not counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_query_ms = getattr(settings, "REQUEST_METRICS_SLOW_QUERY_MS", None)
+        self.slow_query_limit = getattr(settings, "REQUEST_METRICS_SLOW_QUERY_LIMIT", 5)
+        self.server_timing = getattr(settings, "REQUEST_METRICS_SERVER_TIMING", True)
+
+    def __call__(self, request):
+        recorder = QueryRecorder(self.slow_query_ms)
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(recorder))
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - started) * 1000
+        db_ms = recorder.duration * 1000
+
+        match = getattr(request, "resolver_match", None)
+        url_name = match.url_name if match and match.url_name else "unresolved"
+
+        if self.server_timing:
+            response["Server-Timing"] = (
+                f'db;dur={db_ms:.2f};desc="{recorder.count} queries", total;dur={total_ms:.2f}'
+            )
+
+        logger.info(
+            "url_name=%s method=%s status=%s queries=%d db_ms=%.2f total_ms=%.2f",
+            url_name, request.method, response.status_code, recorder.count, db_ms, total_ms,
+            extra={
+                "url_name": url_name,
+                "method": request.method,
+                "status": response.status_code,
+                "queries": recorder.count,
+                "db_ms": round(db_ms, 2),
+                "total_ms": round(total_ms, 2),
+            },
+        )
+        slowest = sorted(recorder.slow, key=lambda query: query[0], reverse=True)[:self.slow_query_limit]
+        for elapsed, sql, origin in slowest:
+            logger.warning(
+                "slow_query url_name=%s ms=%.2f origin=%s sql=%s",
+                url_name, elapsed * 1000, origin, sql,
+                extra={"url_name": url_name, "query_ms": round(elapsed * 1000, 2), "origin": origin, "sql": sql},
+            )
+        return response
@@ -0,0 +1,84 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+_replica_reads = ContextVar("replica_reads", default=False)
+
+
+def replica_aliases():
+    return list(getattr(settings, "DATABASE_REPLICAS", []))
+
+
+def _pin_key(user_id):
+    return f"db:primary-pin:{user_id}"
+
+
+def pin_to_primary(user_id):
+    """Send replica-eligible reads about ``user_id`` to the primary until replicas have caught up."""
+    if replica_aliases():
+        cache.set(_pin_key(user_id), True, getattr(settings, "REPLICA_PIN_SECONDS", 5))
+
+
+def is_pinned(user_id):
+    return user_id is not None and cache.get(_pin_key(user_id)) is not None
+
+
+@contextmanager
+def use_replicas():
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def replica_reads(subject=None):
+    """
+    Let a read-only view send its queries to a replica.
+
+    ``subject(request, *args, **kwargs)`` returns the id of the user whose data
+    the view reads (the requesting user by default). While that user is pinned
+    after a write, the view stays on the primary so it sees its own changes.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            user_id = subject(request, *args, **kwargs) if subject else request.user.id
+            if is_pinned(user_id):
+                return view(request, *args, **kwargs)
+            with use_replicas():
+                return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class PrimaryReplicaRouter:
+    """
+    Writes, and reads outside ``replica_reads`` views, go to ``default``.
+    Reads inside those views are spread over ``DATABASE_REPLICAS`` unless a
+    transaction is open on the primary, whose uncommitted rows a replica
+    cannot see.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = replica_aliases()
+        if replicas and _replica_reads.get() and not connections["default"].in_atomic_block:
+            return random.choice(replicas)
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {"default", *replica_aliases()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from replication, not from migrate.
+        return db not in replica_aliases()
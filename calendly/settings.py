@@ -30,15 +30,25 @@ INSTALLED_APPS = [
     'rest_framework',
     'corsheaders',
     'schedule',
-    'meeting'
+    'meeting',
+    'jobs',
 ]
 
+# Opt-in: the stateless class trusts the token claims instead of loading
+# auth_user on every request, so a deactivated or deleted user stays
+# authenticated until their access token (ACCESS_TOKEN_LIFETIME) expires.
+JWT_STATELESS_AUTH = env.bool('JWT_STATELESS_AUTH', default=False)
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
+        'authentication.backends.StatelessJWTAuthentication'
+        if JWT_STATELESS_AUTH else
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
 }
 
+USER_CACHE_TIMEOUT = env.int('USER_CACHE_TIMEOUT', default=60)
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=10),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=10),
@@ -48,9 +58,11 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
     'AUTH_HEADER_NAME': 'HTTP_AUTHORIZATION',
     'JTI_CLAIM': 'jti',
+    'TOKEN_USER_CLASS': 'authentication.backends.IntTokenUser',
 }
 
 MIDDLEWARE = [
+    'calendly.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     "corsheaders.middleware.CorsMiddleware",
@@ -95,15 +107,82 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'calendly.wsgi.application'
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.mysql',
-        'NAME': env('DB_NAME'),
-        'USER': env('DB_USER'),
-        'PASSWORD': env('DB_PASS'),
-        'HOST': env('DB_HOST', default='127.0.0.1'),
-        'PORT': env('DB_PORT', default='3306'),
+# DATABASE_URL (e.g. sqlite:///db.sqlite3) overrides the MySQL settings for
+# local runs, tests and benchmarks.
+if env('DATABASE_URL', default=None):
+    DATABASES = {
+        'default': env.db('DATABASE_URL'),
     }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.mysql',
+            'NAME': env('DB_NAME'),
+            'USER': env('DB_USER'),
+            'PASSWORD': env('DB_PASS'),
+            'HOST': env('DB_HOST', default='127.0.0.1'),
+            'PORT': env('DB_PORT', default='3306'),
+        }
+    }
+
+# Read replicas, e.g. DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3 next to
+# DATABASE_URL=sqlite:///primary.sqlite3 locally. Views wrapped in
+# calendly.routers.replica_reads send their reads to them; in tests they
+# mirror the default database.
+DATABASE_REPLICAS = []
+for number, url in enumerate(env.list('DATABASE_REPLICA_URLS', default=[]), start=1):
+    DATABASES[f'replica{number}'] = dict(env.db_url_config(url), TEST={'MIRROR': 'default'})
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['calendly.routers.PrimaryReplicaRouter']
+REPLICA_PIN_SECONDS = env.int('REPLICA_PIN_SECONDS', default=5)
+
+# Availability caching, the schedule/meeting version counters behind ETags
+# and the read-replica primary pins all live in this cache, so it must be
+# shared by every worker: set CACHE_URL to redis:// or memcache:// whenever
+# more than one process serves requests. A per-process locmemcache:// only
+# suits a single process; other workers would miss version bumps and serve
+# stale availability for up to SCHEDULE_CACHE_TIMEOUT. Without CACHE_URL
+# nothing is cached and every request reads the database.
+CACHES = {
+    'default': env.cache('CACHE_URL', default='dummycache://'),
+}
+
+SCHEDULE_CACHE_TIMEOUT = env.int('SCHEDULE_CACHE_TIMEOUT', default=60 * 60)
+AVAILABILITY_MAX_AGE = env.int('AVAILABILITY_MAX_AGE', default=30)
+
+REQUEST_METRICS_SERVER_TIMING = env.bool('REQUEST_METRICS_SERVER_TIMING', default=True)
+REQUEST_METRICS_SLOW_QUERY_MS = env.float('REQUEST_METRICS_SLOW_QUERY_MS', default=None)
+REQUEST_METRICS_SLOW_QUERY_LIMIT = env.int('REQUEST_METRICS_SLOW_QUERY_LIMIT', default=5)
+
+# Background jobs are run by `python manage.py run_jobs`.
+JOB_RETRY_DELAY = env.int('JOB_RETRY_DELAY', default=30)
+JOB_MAX_RETRY_DELAY = env.int('JOB_MAX_RETRY_DELAY', default=60 * 60)
+JOB_LOCK_TIMEOUT = env.int('JOB_LOCK_TIMEOUT', default=5 * 60)
+
+EMAIL_BACKEND = env('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
+DEFAULT_FROM_EMAIL = env('DEFAULT_FROM_EMAIL', default='no-reply@calendly.local')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # One INFO line per request; set REQUEST_LOG_LEVEL=INFO to see them.
+        # Slow queries are logged at WARNING.
+        'calendly.requests': {
+            'handlers': ['console'],
+            'level': env('REQUEST_LOG_LEVEL', default='WARNING'),
+            'propagate': False,
+        },
+        'jobs': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
 }
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -0,0 +1,26 @@
+import time
+from django.core.management.base import BaseCommand
+from jobs.queue import claim, run_job
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs, polling the database for new ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch", type=int, default=10, help="jobs claimed per poll")
+        parser.add_argument("--sleep", type=float, default=1.0, help="seconds to wait when the queue is empty")
+        parser.add_argument("--once", action="store_true", help="exit once no jobs are due")
+
+    def handle(self, *args, **options):
+        while True:
+            jobs = claim(options["batch"])
+            for job in jobs:
+                ok = run_job(job)
+                if options["verbosity"] > 1:
+                    self.stdout.write(f"{job.name} #{job.pk}: {job.status}")
+                if not ok and options["verbosity"] > 0:
+                    self.stderr.write(f"{job.name} #{job.pk} failed (attempt {job.attempts}): {job.last_error.splitlines()[-1]}")
+            if not jobs:
+                if options["once"]:
+                    return
+                time.sleep(options["sleep"])
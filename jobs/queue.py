@@ -0,0 +1,96 @@
+import logging
+import traceback
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import Job
+
+logger = logging.getLogger("jobs")
+
+JOB_RETRY_DELAY = getattr(settings, "JOB_RETRY_DELAY", 30)
+JOB_MAX_RETRY_DELAY = getattr(settings, "JOB_MAX_RETRY_DELAY", 60 * 60)
+JOB_LOCK_TIMEOUT = getattr(settings, "JOB_LOCK_TIMEOUT", 5 * 60)
+
+HANDLERS = {}
+
+
+def register(name):
+    """Register ``func(payload)`` as the handler for jobs called ``name``."""
+    def decorator(func):
+        HANDLERS[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, key=None, run_at=None, max_attempts=5):
+    """
+    Queue a job. Called inside a transaction, the job only becomes visible
+    to workers if that transaction commits. A ``key`` that was enqueued
+    before is ignored, whatever became of that job.
+    """
+    Job.objects.bulk_create([Job(
+        name=name,
+        payload=payload or {},
+        idempotency_key=key,
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts,
+    )], ignore_conflicts=True)
+
+
+def claim(batch=10):
+    """Mark up to ``batch`` due jobs as running and return them, skipping rows other workers hold."""
+    now = timezone.now()
+    stale = now - timedelta(seconds=JOB_LOCK_TIMEOUT)
+    with transaction.atomic():
+        jobs = list(
+            Job.objects
+            .select_for_update(skip_locked=True)
+            .filter(Q(status=Job.QUEUED, run_at__lte=now) | Q(status=Job.RUNNING, locked_at__lt=stale))
+            .order_by("run_at", "id")[:batch]
+        )
+        if jobs:
+            Job.objects.filter(id__in=[job.id for job in jobs]).update(status=Job.RUNNING, locked_at=now)
+    for job in jobs:
+        job.status, job.locked_at = Job.RUNNING, now
+    return jobs
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(JOB_RETRY_DELAY * 2 ** (attempts - 1), JOB_MAX_RETRY_DELAY))
+
+
+def run_job(job):
+    job.attempts += 1
+    try:
+        handler = HANDLERS[job.name]
+        handler(job.payload)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            job.status = Job.FAILED
+            job.finished_at = timezone.now()
+            logger.error("job %s #%s failed after %d attempts", job.name, job.pk, job.attempts)
+        else:
+            job.status = Job.QUEUED
+            job.run_at = timezone.now() + retry_delay(job.attempts)
+            logger.warning("job %s #%s failed, retrying at %s", job.name, job.pk, job.run_at)
+    else:
+        job.status = Job.DONE
+        job.finished_at = timezone.now()
+    job.locked_at = None
+    job.save(update_fields=["attempts", "status", "run_at", "locked_at", "last_error", "finished_at"])
+    return job.status == Job.DONE
+
+
+def run_pending(batch=10):
+    """Run due jobs until none are left and return how many ran."""
+    count = 0
+    while True:
+        jobs = claim(batch)
+        if not jobs:
+            return count
+        for job in jobs:
+            run_job(job)
+            count += 1
@@ -0,0 +1,70 @@
+from datetime import timedelta
+from django.test import TestCase
+from django.utils import timezone
+from .models import Job
+from .queue import HANDLERS, claim, enqueue, register, run_pending
+
+calls = []
+
+
+@register("test.record")
+def record(payload):
+    calls.append(payload)
+
+
+@register("test.flaky")
+def flaky(payload):
+    calls.append(payload)
+    if len(calls) < payload["succeed_on"]:
+        raise RuntimeError("not yet")
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_idempotency_key_enqueues_once(self):
+        enqueue("test.record", {"n": 1}, key="once")
+        enqueue("test.record", {"n": 2}, key="once")
+        enqueue("test.record", {"n": 3})
+        self.assertEqual(run_pending(), 2)
+        self.assertEqual(calls, [{"n": 1}, {"n": 3}])
+        self.assertEqual(set(Job.objects.values_list("status", flat=True)), {Job.DONE})
+
+    def test_failed_jobs_back_off_then_give_up(self):
+        enqueue("test.flaky", {"succeed_on": 99}, max_attempts=2)
+        with self.assertLogs("jobs", "WARNING") as logs:
+            self.assertEqual(run_pending(), 1)
+        self.assertIn("retrying", logs.output[0])
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn("not yet", job.last_error)
+
+        Job.objects.update(run_at=timezone.now())
+        with self.assertLogs("jobs", "ERROR"):
+            run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_retry_succeeds(self):
+        enqueue("test.flaky", {"succeed_on": 2})
+        with self.assertLogs("jobs", "WARNING"):
+            run_pending()
+        Job.objects.update(run_at=timezone.now())
+        run_pending()
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+
+    def test_stale_running_jobs_are_reclaimed(self):
+        enqueue("test.record", {"n": 1})
+        self.assertEqual(len(claim()), 1)
+        self.assertEqual(claim(), [])
+        Job.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(len(claim()), 1)
+
+    def test_unknown_handler_fails(self):
+        self.assertNotIn("test.missing", HANDLERS)
+        enqueue("test.missing", max_attempts=1)
+        with self.assertLogs("jobs", "ERROR"):
+            run_pending()
+        self.assertEqual(Job.objects.get().status, Job.FAILED)
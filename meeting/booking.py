@@ -0,0 +1,76 @@
+import time
+from datetime import date
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import OperationalError, transaction
+from schedule.availability import load_schedule
+from schedule.intervals import minute_of
+from .freebusy import FreeBusyIndex
+
+
+BOOKING_LOCK_RETRIES = getattr(settings, "BOOKING_LOCK_RETRIES", 5)
+BOOKING_LOCK_BACKOFF = getattr(settings, "BOOKING_LOCK_BACKOFF", 0.05)
+
+
+class BookingConflict(Exception):
+    pass
+
+
+def lock_host(host_id):
+    """
+    Lock the host's user row for the rest of the transaction.
+
+    Every booking and approval for a host goes through this row, so requests
+    for the same host queue up behind each other while different hosts never
+    contend.
+    """
+    return User.objects.select_for_update().get(pk=host_id)
+
+
+def serialised(func):
+    """
+    Run ``func()`` in a transaction and return its result.
+
+    SQLite has no row locks, so instead of queueing behind ``lock_host`` a
+    contender fails with "database table is locked". Those attempts are rolled
+    back and retried with backoff; if the host is still contended the caller
+    gets a BookingConflict instead of a server error.
+    """
+    for attempt in range(BOOKING_LOCK_RETRIES):
+        try:
+            with transaction.atomic():
+                return func()
+        except OperationalError as e:
+            if "locked" not in str(e):
+                raise
+            time.sleep(BOOKING_LOCK_BACKOFF * 2 ** attempt)
+    raise BookingConflict("The host is busy with another booking, please try again")
+
+
+def check_booking(host, day, start_time, end_time):
+    """Raise BookingConflict unless the window is inside the host's availability and unbooked."""
+    if not day or not start_time or not end_time:
+        raise BookingConflict("day, start_time and end_time are required")
+    if start_time >= end_time:
+        raise BookingConflict("start_time must be before end_time")
+    if day < date.today():
+        raise BookingConflict("Cannot book a meeting in the past")
+
+    # The snapshot's busy index holds pending requests as well as approved
+    # meetings, otherwise two visitors could both book a slot and the host
+    # would have to turn one of them down.
+    snapshot = load_schedule(host, day, day)
+    if not snapshot.busy.is_window_free(day, start_time, end_time):
+        raise BookingConflict("The requested time is already booked")
+    if not snapshot.available_mask(day).contains(minute_of(start_time), minute_of(end_time, is_end=True)):
+        raise BookingConflict("The requested time is not available")
+
+
+def check_approval(meeting):
+    """Raise BookingConflict if approving ``meeting`` would overlap another approved meeting."""
+    if not meeting.day or not meeting.start_time or not meeting.end_time:
+        return
+    approved = FreeBusyIndex.for_host(meeting.user_id, meeting.day, meeting.day, active_only=True)
+    clash = approved.overlapping_window(meeting.day, meeting.start_time, meeting.end_time)
+    if [meeting_id for meeting_id in clash if meeting_id != meeting.id]:
+        raise BookingConflict("Meeting overlaps an approved meeting")
@@ -0,0 +1,94 @@
+import json
+from datetime import datetime, timezone as dt_timezone
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.validators import validate_email
+from django.utils import timezone
+from schedule.models import HostProfile
+from schedule.timezones import get_zone
+from .models import Meeting
+
+EXPORT_FIELDS = ("id", "user", "name", "email", "subject", "created_at", "active", "day", "start_time", "end_time")
+EXPORT_CHUNK_SIZE = 500
+
+
+def export_rows(user_id):
+    """Stream a host's meetings as dicts, ``EXPORT_CHUNK_SIZE`` rows per database fetch."""
+    meetings = Meeting.objects.filter(user_id=user_id).order_by("day", "start_time", "id")
+    return meetings.values(*EXPORT_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def ndjson_lines(user_id):
+    for row in export_rows(user_id):
+        yield json.dumps(row, cls=DjangoJSONEncoder) + "\n"
+
+
+def _escape(text):
+    return (text or "").replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\r\n", "\\n").replace("\r", "\\n").replace("\n", "\\n")
+
+
+def _param(text):
+    # Parameter values cannot be escaped, so drop anything that could end the value or the line.
+    return "".join(char for char in text if char not in '\r\n";,:' and char.isprintable())
+
+
+def _address(email):
+    try:
+        validate_email(email)
+    except ValidationError:
+        return None
+    return email
+
+
+def _fold(line):
+    # RFC 5545 caps content lines at 75 octets; longer ones continue on lines starting with a space.
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts, start = [], 0
+    while start < len(encoded):
+        end = min(start + (75 if not parts else 74), len(encoded))
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(encoded[start:end].decode())
+        start = end
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _stamp(value):
+    return value.astimezone(dt_timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _host_zone(user_id):
+    name = HostProfile.objects.filter(user_id=user_id).values_list("timezone", flat=True).first()
+    try:
+        return get_zone(name or "UTC")
+    except ValueError:
+        return dt_timezone.utc
+
+
+def ics_lines(user_id):
+    yield "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//calendly//meetings//EN\r\nCALSCALE:GREGORIAN\r\n"
+    now = timezone.now()
+    # Meetings are wall-clock times in the host's zone; write them as UTC so
+    # clients don't read them as floating local times.
+    zone = _host_zone(user_id)
+    for row in export_rows(user_id):
+        if not row["day"] or not row["start_time"] or not row["end_time"]:
+            continue
+        summary = row["subject"] or "Meeting with {}".format(row["name"] or row["email"] or "guest")
+        lines = [
+            "BEGIN:VEVENT",
+            f"UID:meeting-{row['id']}@calendly",
+            f"DTSTAMP:{_stamp(row['created_at'] or now)}",
+            f"DTSTART:{_stamp(datetime.combine(row['day'], row['start_time'], tzinfo=zone))}",
+            f"DTEND:{_stamp(datetime.combine(row['day'], row['end_time'], tzinfo=zone))}",
+            f"SUMMARY:{_escape(summary)}",
+            f"STATUS:{'CONFIRMED' if row['active'] else 'TENTATIVE'}",
+        ]
+        email = _address(row["email"] or "")
+        if email:
+            lines.append(f'ATTENDEE;CN="{_param(row["name"] or email)}":mailto:{email}')
+        lines.append("END:VEVENT")
+        yield "".join(_fold(line) for line in lines)
+    yield "END:VCALENDAR\r\n"
@@ -0,0 +1,93 @@
+from bisect import bisect_left, bisect_right
+from schedule.intervals import DAY_MINUTES, DayMask, minute_of
+from .models import Meeting
+
+
+def absolute_minute(day, t, is_end=False):
+    return day.toordinal() * DAY_MINUTES + minute_of(t, is_end)
+
+
+class FreeBusyIndex:
+    """
+    A host's meetings over a date range, kept as parallel arrays sorted by
+    start minute (``day.toordinal() * 1440 + minute``).
+
+    ``max_ends[i]`` is the latest end among the first ``i + 1`` meetings. It
+    never decreases, so bisecting it finds the first meeting that could still
+    be running at a given minute:
+
+    * ``is_free(a, b)`` is two bisections: O(log n).
+    * ``overlapping(a, b)`` is O(log n + m), where m is the number of
+      meetings starting between the first one still running at ``a`` and
+      ``b``. That is the answer itself unless a long meeting is holding
+      ``max_ends`` up.
+    * Building the index is one query plus an O(n log n) sort.
+    """
+
+    def __init__(self, intervals):
+        intervals = sorted(intervals)
+        self.starts = [start for start, end, meeting_id in intervals]
+        self.ends = [end for start, end, meeting_id in intervals]
+        self.ids = [meeting_id for start, end, meeting_id in intervals]
+        self.max_ends = []
+        latest = None
+        for end in self.ends:
+            latest = end if latest is None else max(latest, end)
+            self.max_ends.append(latest)
+
+    @classmethod
+    def for_host(cls, host_id, start_date, end_date, active_only=False):
+        return load_busy([host_id], start_date, end_date, active_only)[host_id]
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _window(self, start, end):
+        return bisect_right(self.max_ends, start), bisect_left(self.starts, end)
+
+    def overlapping(self, start, end):
+        """Ids of the meetings overlapping ``[start, end)``, in start order."""
+        first, stop = self._window(start, end)
+        return [self.ids[i] for i in range(first, stop) if self.ends[i] > start]
+
+    def is_free(self, start, end):
+        stop = bisect_left(self.starts, end)
+        return stop == 0 or self.max_ends[stop - 1] <= start
+
+    def overlapping_window(self, day, start_time, end_time):
+        return self.overlapping(absolute_minute(day, start_time), absolute_minute(day, end_time, is_end=True))
+
+    def is_window_free(self, day, start_time, end_time):
+        return self.is_free(absolute_minute(day, start_time), absolute_minute(day, end_time, is_end=True))
+
+    def busy_bits(self, start_date, num_days):
+        """Busy minutes of ``num_days`` days from ``start_date``, packed like ``pack_days``."""
+        origin = start_date.toordinal() * DAY_MINUTES
+        limit = num_days * DAY_MINUTES
+        first, stop = self._window(origin, origin + limit)
+        bits = 0
+        for i in range(first, stop):
+            low, high = max(self.starts[i] - origin, 0), min(self.ends[i] - origin, limit)
+            if low < high:
+                bits |= ((1 << (high - low)) - 1) << low
+        return bits
+
+    def busy_mask(self, day):
+        return DayMask(self.busy_bits(day, 1))
+
+
+def load_busy(host_ids, start_date, end_date, active_only=False):
+    """
+    Map each of ``host_ids`` to a FreeBusyIndex of its timed meetings between
+    ``start_date`` and ``end_date``, in one query however many hosts there are.
+    Pending requests count as busy unless ``active_only`` is set.
+    """
+    meetings = Meeting.objects.filter(
+        user_id__in=host_ids, day__range=(start_date, end_date), start_time__isnull=False, end_time__isnull=False,
+    )
+    if active_only:
+        meetings = meetings.filter(active=True)
+    intervals = {host_id: [] for host_id in host_ids}
+    for meeting_id, host_id, day, start, end in meetings.values_list("id", "user_id", "day", "start_time", "end_time"):
+        intervals[host_id].append((absolute_minute(day, start), absolute_minute(day, end, is_end=True), meeting_id))
+    return {host_id: FreeBusyIndex(host_intervals) for host_id, host_intervals in intervals.items()}
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.mail import send_mail
+from jobs.queue import enqueue, register
+from .models import Meeting
+
+
+def enqueue_approval(meeting):
+    """Queue the guest notification for an approved meeting."""
+    if meeting.email:
+        enqueue("meeting.notify_approved", {"meeting_id": meeting.id}, key=f"meeting:{meeting.id}:notify-approved")
+
+
+@register("meeting.notify_approved")
+def notify_approved(payload):
+    meeting = Meeting.objects.filter(id=payload["meeting_id"], active=True).select_related("user").first()
+    if meeting is None or not meeting.email:
+        return
+    host = meeting.user.get_full_name() or meeting.user.username if meeting.user else "your host"
+    when = f" on {meeting.day} at {meeting.start_time:%H:%M}" if meeting.day and meeting.start_time else ""
+    send_mail(
+        f"Meeting confirmed: {meeting.subject or 'Meeting'}",
+        f"Hi {meeting.name or 'there'},\n\nYour meeting with {host}{when} has been approved.\n",
+        settings.DEFAULT_FROM_EMAIL,
+        [meeting.email],
+    )
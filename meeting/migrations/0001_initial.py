@@ -0,0 +1,36 @@
+# Generated by Django 4.2.21 on 2026-10-18 18:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# These tables predate the app's migrations. Databases that already have
+# them must record this migration with `python manage.py migrate --fake-initial`
+# before the following migrations can run; a plain `migrate` fails with
+# "table already exists".
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Meeting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.TextField(blank=True, null=True)),
+                ('email', models.TextField(blank=True, null=True)),
+                ('subject', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, null=True)),
+                ('active', models.BooleanField(default=True)),
+                ('day', models.DateField(blank=True, null=True)),
+                ('start_time', models.TimeField(blank=True, null=True)),
+                ('end_time', models.TimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='meetings', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.21 on 2026-10-18 18:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meeting', '0002_meeting_user_day_active_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='meeting',
+            index=models.Index(fields=['user', 'day', 'start_time', 'id'], name='meeting_user_keyset_idx'),
+        ),
+    ]
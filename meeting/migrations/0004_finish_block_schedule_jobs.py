@@ -0,0 +1,26 @@
+# Generated by Django 4.2.21 on 2026-10-18 21:40
+
+from django.db import migrations
+from django.utils import timezone
+
+
+def finish_block_schedule_jobs(apps, schema_editor):
+    # Availability now subtracts approved meetings when it is read, so the
+    # meeting.block_schedule handler is gone. Jobs still waiting for it have
+    # nothing left to do; close them instead of letting them fail as unknown.
+    Job = apps.get_model('jobs', 'Job')
+    Job.objects.filter(name='meeting.block_schedule', status__in=['queued', 'running']).update(
+        status='done', locked_at=None, finished_at=timezone.now(),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meeting', '0003_meeting_user_keyset_idx'),
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(finish_block_schedule_jobs, migrations.RunPython.noop),
+    ]
@@ -10,4 +10,10 @@ class Meeting(models.Model):
     active = models.BooleanField(default=True)
     day = models.DateField(null=True, blank=True)
     start_time = models.TimeField(null=True, blank=True)
-    end_time = models.TimeField(null=True, blank=True)
\ No newline at end of file
+    end_time = models.TimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'day', 'active'], name='meeting_user_day_active_idx'),
+            models.Index(fields=['user', 'day', 'start_time', 'id'], name='meeting_user_keyset_idx'),
+        ]
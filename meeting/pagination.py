@@ -0,0 +1,46 @@
+import base64
+import json
+from datetime import date, time
+from django.db.models import F, Q
+
+KEYSET_FIELDS = ("day", "start_time", "id")
+KEYSET_ORDERING = (F("day").asc(nulls_first=True), F("start_time").asc(nulls_first=True), F("id").asc())
+
+
+def encode_cursor(meeting):
+    values = [
+        meeting.day.isoformat() if meeting.day else None,
+        meeting.start_time.isoformat() if meeting.start_time else None,
+        meeting.id,
+    ]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Return the (day, start_time, id) a cursor points at. Raises ValueError on a malformed cursor."""
+    try:
+        day, start_time, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return (
+            date.fromisoformat(day) if day else None,
+            time.fromisoformat(start_time) if start_time else None,
+            int(pk),
+        )
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def after_cursor(values):
+    """
+    Rows that sort strictly after ``values`` in KEYSET_ORDERING. NULLs sort
+    first, so a NULL in the cursor is passed by any non-NULL value.
+    """
+    condition = Q(pk__in=[])
+    prefix = Q()
+    for field, value in zip(KEYSET_FIELDS, values):
+        if value is None:
+            greater, equal = Q(**{f"{field}__isnull": False}), Q(**{f"{field}__isnull": True})
+        else:
+            greater, equal = Q(**{f"{field}__gt": value}), Q(**{field: value})
+        condition |= prefix & greater
+        prefix &= equal
+    return condition
@@ -1,3 +1,277 @@
-from django.test import TestCase
+import json
+import threading
+from datetime import date, time
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+from jobs.models import Job
+from jobs.queue import run_pending
+from schedule.availability import load_schedule
+from schedule.intervals import DayMask
+from schedule.models import Days, HostProfile
+from schedule.tests import LOCMEM_CACHES, create_weekly_schedule
+from .freebusy import FreeBusyIndex
+from .models import Meeting
 
-# Create your tests here.
+MONDAY = "2030-01-07"
+
+
+def booking(host, start="10:00", end="10:30", day=MONDAY):
+    return {"id": host.id, "name": "Guest", "email": "guest@example.com", "day": day, "start_time": start, "end_time": end}
+
+
+class MeetingBookingTests(TestCase):
+    def setUp(self):
+        self.host = User.objects.create_user(username="host", password="pass")
+        create_weekly_schedule(self.host)
+        cache.clear()
+        self.client = APIClient()
+
+    def book(self, **kwargs):
+        return self.client.post("/api/meeting/create", booking(self.host, **kwargs), format="json").json()
+
+    def test_books_free_slot(self):
+        data = self.book()
+        self.assertEqual(data["code"], 200)
+        self.assertFalse(Meeting.objects.get().active)
+
+    def test_rejects_time_outside_availability(self):
+        self.assertEqual(self.book(start="08:00", end="09:30")["code"], 409)
+        self.assertEqual(self.book(day="2030-01-06")["code"], 409)
+
+    def test_rejects_overlapping_booking(self):
+        self.book()
+        data = self.book(start="10:15", end="10:45")
+        self.assertEqual(data["code"], 409)
+        self.assertEqual(self.book(start="10:30", end="11:00")["code"], 200)
+
+    def test_booking_blocks_schedule(self):
+        self.client.force_authenticate(self.host)
+        daily = f"/api/schedule/daily/open/{self.host.id}"
+        self.assertEqual(self.client.get(daily, {"date": MONDAY}).json()["time_slots"], [
+            {"start_time": "09:00:00", "end_time": "17:00:00"},
+        ])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book()
+        meeting = Meeting.objects.get()
+        monday = meeting.day
+        busy = [
+            {"start_time": "09:00:00", "end_time": "10:00:00"},
+            {"start_time": "10:30:00", "end_time": "17:00:00"},
+        ]
+        # The pending request already holds its slot, and approving it keeps it held.
+        self.assertEqual(self.client.get(daily, {"date": MONDAY}).json()["time_slots"], busy)
+        with self.captureOnCommitCallbacks(execute=True):
+            data = self.client.get(f"/api/meeting/toggle/{meeting.id}").json()
+        self.assertTrue(data["active"])
+        self.assertEqual(load_schedule(self.host, monday, monday).available_slots(monday), busy)
+        self.assertEqual(self.client.get(daily, {"date": MONDAY}).json()["time_slots"], busy)
+        self.assertFalse(Days.objects.filter(user=self.host, is_repeating=False).exists())
+
+        # Toggling again must not queue the notification twice.
+        self.client.get(f"/api/meeting/toggle/{meeting.id}")
+        self.assertEqual(Job.objects.count(), 1)
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["guest@example.com"])
+
+        # Deleting the meeting frees its time again.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f"/api/meeting/delete/{meeting.id}")
+        self.assertEqual(self.client.get(daily, {"date": MONDAY}).json()["time_slots"], [
+            {"start_time": "09:00:00", "end_time": "17:00:00"},
+        ])
+
+    def test_books_in_guest_timezone(self):
+        HostProfile.objects.create(user=self.host, timezone="America/New_York")
+        # 16:00 in Berlin is 10:00 in New York.
+        data = self.client.post("/api/meeting/create", {**booking(self.host, start="16:00", end="16:30"), "tz": "Europe/Berlin"}, format="json").json()
+        self.assertEqual(data["code"], 200)
+        self.assertEqual((data["data"]["day"], data["data"]["start_time"], data["data"]["end_time"]), (MONDAY, "10:00:00", "10:30:00"))
+
+        self.client.force_authenticate(self.host)
+        data = self.client.get(f"/api/schedule/daily/open/{self.host.id}", {"date": MONDAY, "tz": "Europe/Berlin"}).json()
+        self.assertEqual(data["time_slots"], [
+            {"start_time": "15:00:00", "end_time": "16:00:00"},
+            {"start_time": "16:30:00", "end_time": "23:00:00"},
+        ])
+        # 14:30 in Berlin is 08:30 in New York, before the host's day starts.
+        data = self.client.post("/api/meeting/create", {**booking(self.host, start="14:30", end="15:30"), "tz": "Europe/Berlin"}, format="json").json()
+        self.assertEqual(data["code"], 409)
+        data = self.client.post("/api/meeting/create", {**booking(self.host), "tz": "Nowhere/Land"}, format="json").json()
+        self.assertEqual(data["code"], 400)
+
+    def test_pending_meeting_holds_its_slot(self):
+        pending = Meeting.objects.create(user=self.host, day=MONDAY, start_time=time(13), end_time=time(14), active=False)
+        data = self.book(start="13:30", end="14:30")
+        self.assertEqual((data["code"], data["error"]), (409, "The requested time is already booked"))
+
+        self.client.force_authenticate(self.host)
+        held = [
+            {"start_time": "09:00:00", "end_time": "13:00:00"},
+            {"start_time": "14:00:00", "end_time": "17:00:00"},
+        ]
+        daily = self.client.get(f"/api/schedule/daily/open/{self.host.id}", {"date": MONDAY}).json()
+        self.assertEqual(daily["time_slots"], held)
+        ranged = self.client.get(f"/api/schedule/range/open/{self.host.id}", {"start": MONDAY, "end": MONDAY}).json()
+        self.assertEqual(ranged["days"][0]["time_slots"], held)
+        collective = self.client.get("/api/schedule/collective/open", {"users": str(self.host.id), "start": MONDAY}).json()
+        self.assertEqual(collective["days"][0]["time_slots"], held)
+
+        # Approval only checks other approved meetings, so the held slot can still be approved.
+        self.assertEqual(self.client.get(f"/api/meeting/toggle/{pending.id}").json()["code"], 200)
+
+    def test_approval_rejects_overlap_with_approved_meeting(self):
+        first = Meeting.objects.create(user=self.host, day="2030-01-07", start_time=time(10), end_time=time(11), active=True)
+        second = Meeting.objects.create(user=self.host, day="2030-01-07", start_time=time(10, 30), end_time=time(11, 30), active=False)
+        self.client.force_authenticate(self.host)
+        data = self.client.get(f"/api/meeting/toggle/{second.id}").json()
+        self.assertEqual(data["code"], 409)
+        second.refresh_from_db()
+        self.assertFalse(second.active)
+        self.assertTrue(Meeting.objects.filter(id=first.id, active=True).exists())
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class MeetingListTests(TestCase):
+    def setUp(self):
+        self.host = User.objects.create_user(username="host", password="pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.host)
+        Meeting.objects.create(user=self.host, name="undated")
+        for day in (9, 8, 7):
+            for hour in (11, 10):
+                Meeting.objects.create(
+                    user=self.host, day=date(2030, 1, day), start_time=time(hour), end_time=time(hour, 30),
+                    email=f"guest{day}@example.com", active=hour == 10,
+                )
+
+    def test_pages_follow_day_start_time_id(self):
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            with self.assertNumQueries(1):
+                data = self.client.get("/api/meeting/", params).json()
+            seen += [(m["day"], m["start_time"]) for m in data["data"]]
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+        self.assertEqual(seen[0], (None, None))
+        self.assertEqual(seen[1:], sorted(seen[1:]))
+        self.assertEqual(len(seen), 7)
+
+    def test_filters_and_sparse_fields(self):
+        data = self.client.get("/api/meeting/", {"start": "2030-01-08", "active": "true", "fields": "id,day"}).json()
+        self.assertEqual([m["day"] for m in data["data"]], ["2030-01-08", "2030-01-09"])
+        self.assertEqual(set(data["data"][0]), {"id", "day"})
+
+        data = self.client.get("/api/meeting/", {"email": "guest7@example.com"}).json()
+        self.assertEqual(len(data["data"]), 2)
+
+    def test_rejects_bad_cursor(self):
+        self.assertEqual(self.client.get("/api/meeting/", {"cursor": "nope"}).json()["code"], 400)
+
+    def test_export_ndjson(self):
+        response = self.client.get("/api/meeting/export")
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(rows[1]["day"], "2030-01-07")
+        self.assertEqual(rows[1]["start_time"], "10:00:00")
+
+    def test_export_ics(self):
+        response = self.client.get("/api/meeting/export", {"type": "ics"})
+        body = b"".join(response.streaming_content).decode()
+        self.assertTrue(body.startswith("BEGIN:VCALENDAR\r\n"))
+        self.assertEqual(body.count("BEGIN:VEVENT"), 6)
+        self.assertIn("DTSTART:20300107T100000Z\r\n", body)
+
+    def test_export_ics_uses_host_zone(self):
+        HostProfile.objects.create(user=self.host, timezone="America/New_York")
+        response = self.client.get("/api/meeting/export", {"type": "ics"})
+        body = b"".join(response.streaming_content).decode()
+        self.assertIn("DTSTART:20300107T150000Z\r\n", body)
+        self.assertIn("DTEND:20300107T153000Z\r\n", body)
+
+    def test_export_ics_sanitises_attendee(self):
+        Meeting.objects.all().delete()
+        Meeting.objects.create(
+            user=self.host, day=date(2030, 1, 7), start_time=time(10), end_time=time(11),
+            name='Eve"\r\nATTENDEE:mailto:x@evil.test;ROLE=CHAIR', email="guest@example.com",
+        )
+        Meeting.objects.create(
+            user=self.host, day=date(2030, 1, 8), start_time=time(10), end_time=time(11),
+            name="Mallory", email="a@example.com\r\nORGANIZER:mailto:b@evil.test",
+        )
+        response = self.client.get("/api/meeting/export", {"type": "ics"})
+        body = b"".join(response.streaming_content).decode()
+        unfolded = body.replace("\r\n ", "")
+        self.assertEqual([line for line in unfolded.split("\r\n") if line.startswith(("ATTENDEE", "ORGANIZER"))], [
+            'ATTENDEE;CN="EveATTENDEEmailtox@evil.testROLE=CHAIR":mailto:guest@example.com',
+        ])
+
+    def test_export_conditional_get(self):
+        cache.clear()
+        etag = self.client.get("/api/meeting/export")["ETag"]
+        response = self.client.get("/api/meeting/export", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f"/api/meeting/delete/{Meeting.objects.first().id}")
+        response = self.client.get("/api/meeting/export", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class ConcurrentBookingTests(TransactionTestCase):
+    def test_concurrent_bookings_for_one_slot(self):
+        host = User.objects.create_user(username="host", password="pass")
+        create_weekly_schedule(host)
+        results = []
+        barrier = threading.Barrier(8)
+
+        def book():
+            try:
+                barrier.wait()
+                response = APIClient().post("/api/meeting/create", booking(host), format="json")
+                results.append(response.json()["code"])
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=book) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), 8)
+        self.assertEqual(results.count(200), 1)
+        self.assertEqual(results.count(409), 7)
+        self.assertEqual(Meeting.objects.filter(user=host).count(), 1)
+
+
+class FreeBusyIndexTests(TestCase):
+    def setUp(self):
+        self.host = User.objects.create_user(username="host", password="pass")
+        self.day = date(2030, 1, 7)
+        self.long = Meeting.objects.create(user=self.host, day=self.day, start_time=time(8), end_time=time(18), active=False)
+        self.first = Meeting.objects.create(user=self.host, day=self.day, start_time=time(9), end_time=time(10), active=True)
+        self.second = Meeting.objects.create(user=self.host, day=self.day, start_time=time(11), end_time=time(12), active=True)
+        Meeting.objects.create(user=self.host, day=date(2030, 1, 8), start_time=time(9), end_time=time(10), active=True)
+
+    def test_overlaps_and_free_windows(self):
+        index = FreeBusyIndex.for_host(self.host.id, self.day, self.day, active_only=True)
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.overlapping_window(self.day, time(9, 30), time(11, 30)), [self.first.id, self.second.id])
+        self.assertEqual(index.overlapping_window(self.day, time(10), time(11)), [])
+        self.assertTrue(index.is_window_free(self.day, time(10), time(11)))
+        self.assertFalse(index.is_window_free(self.day, time(11, 59), time(13)))
+
+        everything = FreeBusyIndex.for_host(self.host.id, self.day, date(2030, 1, 8))
+        self.assertEqual(everything.overlapping_window(self.day, time(10), time(11)), [self.long.id])
+        self.assertFalse(everything.is_window_free(self.day, time(17), time(17, 30)))
+        self.assertEqual(everything.busy_mask(date(2030, 1, 8)).intervals(), [(540, 600)])
+        self.assertEqual(DayMask(everything.busy_bits(self.day, 2)).intervals(), [(480, 1080)])
@@ -5,6 +5,7 @@ app_name = 'contact'
 
 urlpatterns = [
     path('', views.meetingList, name='meeting-list'),
+    path('export', views.meetingExport, name='meeting-export'),
     path('detail/<int:pk>', views.meetingDetail, name='meeting-detail'),
     path('create', views.meetingCreate, name='meeting-create'),
     path('delete/<int:pk>', views.meetingDelete, name='meeting-delete'),
@@ -3,56 +3,74 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from datetime import time, datetime as dt, date
+from datetime import datetime as dt
 from .models import Meeting
 from .serializers import MeetingSerializer
-from schedule.models import Days, Time
+from django.http import HttpResponseNotModified, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+from django.utils.http import quote_etag
+from schedule.availability import host_timezone
+from schedule.cache import bump_meeting_version, meeting_version
+from schedule.timezones import convert_window
+from schedule.conditional import is_not_modified
+from .booking import BookingConflict, check_approval, check_booking, lock_host, serialised
+from .export import ics_lines, ndjson_lines
+from .jobs import enqueue_approval
+from calendly.routers import replica_reads
+from .pagination import KEYSET_FIELDS, KEYSET_ORDERING, after_cursor, decode_cursor, encode_cursor
 
-def time_from_str(t_str):
-    t_str = t_str.strip()
-    if t_str.startswith("24:"):
-        return time(23, 59)
-    try:
-        hour, minute = map(int, t_str.split(":"))
-        if hour > 23 or minute > 59:
-            raise ValueError("Hour must be 0-23 and minute 0-59")
-        return time(hour, minute)
-    except ValueError:
-        dt_obj = dt.strptime(t_str, "%I:%M %p")
-        return time(dt_obj.hour, dt_obj.minute)
-
-def merge_intervals(intervals):
-    if not intervals:
-        return []
-    sorted_intervals = sorted(intervals, key=lambda x: x["start"])
-    merged = [sorted_intervals[0]]
-    for current in sorted_intervals[1:]:
-        last = merged[-1]
-        if current["start"] <= last["end"]:
-            last["end"] = max(last["end"], current["end"])
-        else:
-            merged.append(current)
-    return merged
-
-def apply_specific_unavailable(day_obj, specific_unavailable_times):
-    current_unavailable = [{"start": t.start_time, "end": t.end_time} for t in day_obj.times.all()]
-    new_unavailable = [{"start": time_from_str(t["start_time"]), "end": time_from_str(t["end_time"])} for t in specific_unavailable_times]
-    merged = merge_intervals(current_unavailable + new_unavailable)
-    day_obj.times.all().delete()
-    for interval in merged:
-        Time.objects.create(day=day_obj, start_time=interval["start"], end_time=interval["end"])
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+MEETING_FIELDS = {field.name for field in Meeting._meta.concrete_fields}
+EXPORT_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'ics': 'text/calendar; charset=utf-8',
+}
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@replica_reads()
 def meetingList(request):
     user = request.user
+    params = request.query_params
     try:
-        meetings = Meeting.objects.filter(user=user)
-        serializer = MeetingSerializer(meetings, many=True)
+        limit = min(int(params.get('limit', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        if limit < 1:
+            raise ValueError("limit must be positive")
+
+        meetings = Meeting.objects.filter(user_id=user.id)
+        if params.get('start'):
+            meetings = meetings.filter(day__gte=dt.strptime(params['start'], "%Y-%m-%d").date())
+        if params.get('end'):
+            meetings = meetings.filter(day__lte=dt.strptime(params['end'], "%Y-%m-%d").date())
+        if params.get('active') in ('true', 'false'):
+            meetings = meetings.filter(active=params['active'] == 'true')
+        if params.get('email'):
+            meetings = meetings.filter(email=params['email'])
+        if params.get('cursor'):
+            meetings = meetings.filter(after_cursor(decode_cursor(params['cursor'])))
+
+        fields = None
+        if params.get('fields'):
+            fields = [name for name in params['fields'].split(',') if name in MEETING_FIELDS]
+            meetings = meetings.only(*set(fields) | set(KEYSET_FIELDS))
+    except ValueError as e:
+        return Response({
+            'code': status.HTTP_400_BAD_REQUEST,
+            'response': "Invalid query parameters",
+            'error': str(e)
+        })
+
+    try:
+        page = list(meetings.order_by(*KEYSET_ORDERING)[:limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit]
+        serializer = MeetingSerializer(page, many=True, fields=fields)
         return Response({
             'code': status.HTTP_200_OK,
             'response': "Received Data Successfully",
-            "data": serializer.data
+            "data": serializer.data,
+            "next_cursor": encode_cursor(page[-1]) if has_more else None
         })
     except Exception as e:
         return Response({
@@ -63,9 +81,34 @@ def meetingList(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+def meetingExport(request):
+    export_type = request.query_params.get('type', 'ndjson')
+    if export_type not in EXPORT_CONTENT_TYPES:
+        return Response({
+            'code': status.HTTP_400_BAD_REQUEST,
+            'response': "type must be one of: " + ", ".join(EXPORT_CONTENT_TYPES)
+        })
+
+    user_id = request.user.id
+    version = meeting_version(user_id)
+    etag = quote_etag(f"meetings-{user_id}-{version}-{export_type}") if version is not None else None
+    if is_not_modified(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        lines = ics_lines(user_id) if export_type == 'ics' else ndjson_lines(user_id)
+        response = StreamingHttpResponse(lines, content_type=EXPORT_CONTENT_TYPES[export_type])
+        response['Content-Disposition'] = f'attachment; filename="meetings.{export_type}"'
+    if etag:
+        response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@replica_reads()
 def meetingDetail(request, pk):
     try:
-        meeting = Meeting.objects.get(id=pk, user=request.user)
+        meeting = Meeting.objects.get(id=pk, user_id=request.user.id)
         serializer = MeetingSerializer(meeting)
         return Response({
             'code': status.HTTP_200_OK,
@@ -82,22 +125,55 @@ def meetingDetail(request, pk):
 def meetingCreate(request):
     try:
         user_id = request.data.get('id', None)
-        if user_id:
-            user_instance = User.objects.get(id=user_id)
-        else:
-            user_instance = None
         serializer = MeetingSerializer(data=request.data)
-        if serializer.is_valid():
-            serializer.save(user=user_instance, active=False)
+        if not serializer.is_valid():
             return Response({
-                'code': status.HTTP_200_OK,
-                'response': "Meeting created successfully",
-                "data": serializer.data
+                'code': status.HTTP_400_BAD_REQUEST,
+                'response': "Invalid data",
+                'errors': serializer.errors
             })
+
+        # Guests may send their own ``tz``; meetings are stored on the host's wall clock.
+        when = {name: serializer.validated_data.get(name) for name in ('day', 'start_time', 'end_time')}
+        tz = request.data.get('tz')
+        if tz and user_id and all(when.values()):
+            when = dict(zip(when, convert_window(*when.values(), tz, host_timezone(user_id))))
+
+        def book():
+            # A retried attempt starts from scratch; the previous insert was rolled back.
+            serializer.instance = None
+            if user_id:
+                user_instance = lock_host(user_id)
+                check_booking(user_instance, when['day'], when['start_time'], when['end_time'])
+            else:
+                user_instance = None
+            serializer.save(user=user_instance, active=False, **when)
+            if user_instance:
+                bump_meeting_version(user_instance.id)
+
+        serialised(book)
+
+        return Response({
+            'code': status.HTTP_200_OK,
+            'response': "Meeting created successfully",
+            "data": serializer.data
+        })
+    except User.DoesNotExist:
+        return Response({
+            'code': status.HTTP_404_NOT_FOUND,
+            'response': "User not found"
+        })
+    except ValueError as e:
         return Response({
             'code': status.HTTP_400_BAD_REQUEST,
             'response': "Invalid data",
-            'errors': serializer.errors
+            'error': str(e)
+        })
+    except BookingConflict as e:
+        return Response({
+            'code': status.HTTP_409_CONFLICT,
+            'response': "Meeting could not be booked",
+            'error': str(e)
         })
     except Exception as e:
         return Response({
@@ -110,8 +186,9 @@ def meetingCreate(request):
 @permission_classes([IsAuthenticated])
 def meetingDelete(request, pk):
     try:
-        meeting = Meeting.objects.get(id=pk, user=request.user)
+        meeting = Meeting.objects.get(id=pk, user_id=request.user.id)
         meeting.delete()
+        bump_meeting_version(request.user.id)
         return Response({
             'code': status.HTTP_204_NO_CONTENT,
             'response': "Meeting deleted successfully"
@@ -126,27 +203,21 @@ def meetingDelete(request, pk):
 @permission_classes([IsAuthenticated])
 def meetingToggle(request, pk):
     try:
-        meeting = Meeting.objects.get(id=pk, user=request.user)
-
-        if not meeting.active:
-            meeting.active = True
-            meeting.save()
-
-        if meeting.active and meeting.start_time and meeting.end_time:
-            target_date = meeting.day if meeting.day else date.today()
-            weekday_name = target_date.strftime("%A").lower()
-
-            repeating_day = Days.objects.filter(user=request.user, is_repeating=True,  available_repeating_days__icontains=weekday_name).first()
+        def approve():
+            lock_host(request.user.id)
+            meeting = Meeting.objects.get(id=pk, user_id=request.user.id)
+            check_approval(meeting)
 
-            if repeating_day:
-                day_obj, created = Days.objects.get_or_create(user=request.user, day=target_date, is_repeating=False)
-                if created or not day_obj.times.exists():
-                    for t in repeating_day.times.all():
-                        Time.objects.create(day=day_obj, start_time=t.start_time, end_time=t.end_time)
-            else:
-                day_obj, created = Days.objects.get_or_create(user=request.user, day=target_date, is_repeating=False)
+            # Availability already subtracts the meeting while it is pending,
+            # so approving is this one row update; the guest email runs in the
+            # job worker and is only queued if this commits.
+            if Meeting.objects.filter(id=meeting.id, active=False).update(active=True):
+                meeting.active = True
+                bump_meeting_version(request.user.id)
+            enqueue_approval(meeting)
+            return meeting
 
-            apply_specific_unavailable(day_obj, [{"start_time": meeting.start_time.strftime("%H:%M"), "end_time": meeting.end_time.strftime("%H:%M")}])
+        meeting = serialised(approve)
 
         return Response({
             'code': status.HTTP_200_OK,
@@ -159,9 +230,15 @@ def meetingToggle(request, pk):
             'code': status.HTTP_404_NOT_FOUND,
             'response': "Meeting not found"
         })
+    except BookingConflict as e:
+        return Response({
+            'code': status.HTTP_409_CONFLICT,
+            'response': "Meeting could not be approved",
+            'error': str(e)
+        })
     except Exception as e:
         return Response({
             'code': status.HTTP_500_INTERNAL_SERVER_ERROR,
             'response': "An error occurred while toggling the meeting",
             'error': str(e)
-        })
\ No newline at end of file
+        })
@@ -0,0 +1,252 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Q, Prefetch
+from meeting.freebusy import load_busy
+from .intervals import DAY_MINUTES, DayMask, bookable_starts, pack_days, slot_of, unpack_days
+from .models import Days, HostProfile, Time
+from .recurrence import matches, occurrences, parse_rrule
+from .timezones import convert_days
+
+
+def date_range(start_date, end_date):
+    current = start_date
+    while current <= end_date:
+        yield current
+        current += timedelta(days=1)
+
+
+class ScheduleSnapshot:
+    """
+    A user's schedule for a date range, loaded once and evaluated in memory.
+
+    Repeating entries are indexed by weekday and specific-day overrides by
+    date, so every day in the range is answered without touching the database.
+    Recurrence rules open their times on top of the weekday template; they are
+    expanded over ``window`` the first time a date is asked for. Minutes taken
+    by the meetings in ``busy``, pending or approved, are never available.
+    """
+
+    def __init__(self, repeating_entries, specific_entries, busy=None, window=None):
+        self.busy = busy
+        self.window = window
+        self.rules = []
+        self._rule_masks = None
+        self.weekday_masks = {}
+        for entry in repeating_entries:
+            if entry.rrule:
+                ended = window and entry.until and entry.until < window[0]
+                if entry.day and not ended:
+                    self.rules.append((parse_rrule(entry.rrule), entry.day, DayMask.from_rows(entry.times.all())))
+                continue
+            if not entry.weekdays:
+                continue
+            mask = DayMask.from_rows(entry.times.all())
+            for weekday in range(7):
+                if entry.weekdays & (1 << weekday):
+                    self.weekday_masks[weekday] = self.weekday_masks.get(weekday, DayMask()) | mask
+
+        # Mirrors ``.first()``: the lowest id wins when a date has several overrides.
+        self.specific_masks = {}
+        for entry in specific_entries:
+            if entry.day not in self.specific_masks:
+                self.specific_masks[entry.day] = DayMask.from_rows(entry.times.all())
+
+    def rule_masks(self):
+        """Unavailability of every date in the window some rule falls on; several rules on a date combine their openings."""
+        if self._rule_masks is None:
+            self._rule_masks = {}
+            for rule, dtstart, mask in self.rules:
+                for day in occurrences(rule, dtstart, *self.window):
+                    self._rule_masks[day] = self._rule_masks[day] & mask if day in self._rule_masks else mask
+        return self._rule_masks
+
+    def rule_mask(self, target_date):
+        if self.window and self.window[0] <= target_date <= self.window[1]:
+            return self.rule_masks().get(target_date)
+        mask = None
+        for rule, dtstart, rule_unavailable in self.rules:
+            if matches(rule, dtstart, target_date):
+                mask = rule_unavailable if mask is None else mask & rule_unavailable
+        return mask
+
+    def unavailable_mask(self, target_date):
+        if target_date in self.specific_masks:
+            return self.specific_masks[target_date]
+        mask = self.weekday_masks.get(target_date.weekday(), DayMask.full())
+        if self.rules:
+            rule_mask = self.rule_mask(target_date)
+            if rule_mask is not None:
+                mask &= rule_mask
+        return mask
+
+    def available_mask(self, target_date):
+        mask = ~self.unavailable_mask(target_date)
+        if self.busy:
+            mask &= ~self.busy.busy_mask(target_date)
+        return mask
+
+    def available_slots(self, target_date):
+        return self.available_mask(target_date).slots()
+
+    def available_days(self, dates):
+        return [str(d) for d in dates if self.available_mask(d)]
+
+    def range_bits(self, start_date, end_date):
+        bits = pack_days(~self.unavailable_mask(d) for d in date_range(start_date, end_date))
+        if self.busy:
+            bits &= ~self.busy.busy_bits(start_date, (end_date - start_date).days + 1)
+        return bits
+
+
+def load_schedules(user_ids, start_date, end_date):
+    """
+    Load the schedules of several users for ``start_date``..``end_date`` in
+    the same three queries ``load_schedule`` uses for one: the entries, their
+    Time rows and the meetings in the range.
+    """
+    entries = (
+        Days.objects
+        .filter(user_id__in=user_ids)
+        .filter(
+            Q(is_repeating=True, rrule__isnull=True)
+            # Recurrence rules that start after the range or ended before it cannot touch it.
+            | Q(is_repeating=True, rrule__isnull=False, day__lte=end_date) & (Q(until__isnull=True) | Q(until__gte=start_date))
+            | Q(is_repeating=False, day__range=(start_date, end_date))
+        )
+        .order_by("id")
+        .prefetch_related(Prefetch("times", queryset=Time.objects.order_by("id")))
+    )
+    repeating = {user_id: [] for user_id in user_ids}
+    specific = {user_id: [] for user_id in user_ids}
+    for entry in entries:
+        (repeating if entry.is_repeating else specific)[entry.user_id].append(entry)
+    busy = load_busy(user_ids, start_date, end_date)
+    return {
+        user_id: ScheduleSnapshot(repeating[user_id], specific[user_id], busy[user_id], (start_date, end_date))
+        for user_id in user_ids
+    }
+
+
+def load_schedule(user, start_date, end_date):
+    """
+    Load ``user``'s repeating entries, the specific-day overrides between
+    ``start_date`` and ``end_date``, all of their Time rows and the booked
+    meetings in the range in three queries, regardless of its length.
+    """
+    return load_schedules([user.id], start_date, end_date)[user.id]
+
+
+def host_timezone(user_id):
+    return host_timezones([user_id])[user_id]
+
+
+def host_timezones(user_ids):
+    zones = dict(HostProfile.objects.filter(user_id__in=user_ids).values_list("user_id", "timezone"))
+    return {user_id: zones.get(user_id) or settings.TIME_ZONE for user_id in user_ids}
+
+
+def snapshot_masks(snapshot, start_date, end_date, tz=None, host_tz=None):
+    """
+    Available DayMask of every day from ``start_date`` to ``end_date``.
+
+    Without ``tz`` the days and minutes are the host's own wall clock. With
+    it they are wall-clock days of ``tz``: the host's days around the range
+    are packed into one integer and shifted across in bulk by
+    ``convert_days``, so the snapshot must cover two extra days either side.
+    """
+    if tz is None or tz == host_tz:
+        return [snapshot.available_mask(d) for d in date_range(start_date, end_date)]
+    host_start, host_end = start_date - timedelta(days=2), end_date + timedelta(days=2)
+    num_days = (end_date - start_date).days + 1
+    return convert_days(snapshot.range_bits(host_start, host_end), host_start, host_tz, start_date, num_days, tz)
+
+
+def available_masks(user, start_date, end_date, tz=None, host_tz=None):
+    if tz is None:
+        return snapshot_masks(load_schedule(user, start_date, end_date), start_date, end_date)
+    host_tz = host_tz or host_timezone(user.id)
+    snapshot = load_schedule(user, start_date - timedelta(days=2), end_date + timedelta(days=2))
+    return snapshot_masks(snapshot, start_date, end_date, tz, host_tz)
+
+
+def next_available(masks, start_date, booking=None):
+    """The ``(date, slot)`` of the first free slot in ``masks``, consecutive days from ``start_date``, or None."""
+    if booking:
+        for offset, starts in enumerate(bookable_starts(masks, **booking)):
+            if starts:
+                return start_date + timedelta(days=offset), slot_of(starts[0], starts[0] + booking["duration"])
+        return None
+    bits = pack_days(masks)
+    if not bits:
+        return None
+    offset = ((bits & -bits).bit_length() - 1) // DAY_MINUTES
+    return start_date + timedelta(days=offset), masks[offset].slots()[0]
+
+
+def batch_availability(user_ids, start_date, end_date, tz=None):
+    """
+    Map each of ``user_ids`` to its available DayMasks from ``start_date`` to
+    ``end_date``, using three schedule queries (and one timezone query when
+    ``tz`` is given) however many hosts there are.
+    """
+    zones = host_timezones(user_ids) if tz is not None else {}
+    margin = timedelta(days=2 if tz is not None else 0)
+    snapshots = load_schedules(user_ids, start_date - margin, end_date + margin)
+    return {
+        user_id: snapshot_masks(snapshot, start_date, end_date, tz, zones.get(user_id))
+        for user_id, snapshot in snapshots.items()
+    }
+
+
+def availability_heatmap(user, start_date, num_days, tz=None):
+    """
+    Free minutes and first free minute (-1 for none) of each of ``num_days``
+    days from ``start_date``, as two flat lists indexed by day offset.
+    """
+    masks = available_masks(user, start_date, start_date + timedelta(days=num_days - 1), tz)
+    free = [mask.free_minutes() for mask in masks]
+    earliest = [-1 if mask.first_free() is None else mask.first_free() for mask in masks]
+    return free, earliest
+
+
+def bookable_slots(masks, duration, step=None, buffer_before=0, buffer_after=0):
+    """Turn a run of day masks into the concrete bookable slots of each day."""
+    return [
+        [slot_of(start, start + duration) for start in starts]
+        for starts in bookable_starts(masks, duration, step, buffer_before, buffer_after)
+    ]
+
+
+def iter_availability(user, start_date, end_date, chunk_days=31, tz=None):
+    """
+    Yield ``(date, DayMask)`` for every day of the range, loading the schedule
+    ``chunk_days`` at a time so memory stays flat however long the range is.
+    """
+    host_tz = host_timezone(user.id) if tz is not None else None
+    chunk_start = start_date
+    while chunk_start <= end_date:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end_date)
+        masks = available_masks(user, chunk_start, chunk_end, tz, host_tz)
+        yield from zip(date_range(chunk_start, chunk_end), masks)
+        chunk_start = chunk_end + timedelta(days=1)
+
+
+def collective_availability(user_ids, start_date, end_date, tz="UTC"):
+    """
+    Return ``(date, DayMask)`` pairs, in wall-clock days of ``tz``, for the
+    minutes in which every user in ``user_ids`` is free.
+
+    Each host is first converted from its own timezone, then its range is
+    packed into a single integer, so intersecting N hosts over D days is N
+    big-integer ANDs rather than N * D per-day merges.
+    """
+    zones = host_timezones(user_ids)
+    margin = timedelta(days=2)
+    snapshots = load_schedules(user_ids, start_date - margin, end_date + margin)
+    num_days = (end_date - start_date).days + 1
+    bits = -1
+    for user_id, snapshot in snapshots.items():
+        bits &= pack_days(snapshot_masks(snapshot, start_date, end_date, tz, zones[user_id]))
+        if not bits:
+            break
+    return list(zip(date_range(start_date, end_date), unpack_days(bits, num_days)))
@@ -0,0 +1,120 @@
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from calendly.routers import pin_to_primary
+from .availability import availability_heatmap, available_masks, bookable_slots, date_range, host_timezone
+
+SCHEDULE_CACHE_TIMEOUT = getattr(settings, "SCHEDULE_CACHE_TIMEOUT", 60 * 60)
+
+
+def _version_key(kind, user_id):
+    return f"{kind}:version:{user_id}"
+
+
+def _fresh_version():
+    # Seeded from the clock rather than 1 so that a version lost to eviction
+    # or a restart never comes back as one that was already handed out.
+    return time.time_ns() // 1000
+
+
+def state_version(kind, user_id):
+    """
+    The current version of ``user_id``'s ``kind`` state, or None when the
+    cache keeps nothing (DummyCache) and so cannot tell two states apart.
+    """
+    key = _version_key(kind, user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _fresh_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_state_version(kind, user_id):
+    def bump():
+        pin_to_primary(user_id)
+        try:
+            cache.incr(_version_key(kind, user_id))
+        except ValueError:
+            cache.set(_version_key(kind, user_id), _fresh_version(), None)
+
+    # Outside a transaction this runs immediately; inside one it waits for
+    # the commit so readers never cache rows that are about to roll back.
+    transaction.on_commit(bump)
+
+
+def schedule_version(user_id):
+    return state_version("schedule", user_id)
+
+
+def bump_schedule_version(user_id):
+    bump_state_version("schedule", user_id)
+
+
+def meeting_version(user_id):
+    return state_version("meeting", user_id)
+
+
+def bump_meeting_version(user_id):
+    bump_state_version("meeting", user_id)
+
+
+def cached_availability(user_id, name, compute):
+    # Booked meetings are subtracted from the schedule, so entries go stale
+    # when either the schedule or the host's meetings change.
+    versions = (schedule_version(user_id), meeting_version(user_id))
+    if None in versions:
+        return compute()
+    key = f"schedule:{user_id}:{versions[0]}:{versions[1]}:{name}"
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, SCHEDULE_CACHE_TIMEOUT)
+    return value
+
+
+def schedule_timezone(user):
+    return cached_availability(user.id, "timezone", lambda: host_timezone(user.id))
+
+
+def daily_slots(user, target_date, tz=None):
+    return cached_availability(
+        user.id,
+        f"daily:{target_date}:{tz or ''}",
+        lambda: available_masks(user, target_date, target_date, tz)[0].slots(),
+    )
+
+
+def available_days(user, dates, tz=None):
+    if not dates:
+        return []
+
+    def compute():
+        wanted = set(dates)
+        masks = available_masks(user, dates[0], dates[-1], tz)
+        return [str(d) for d, mask in zip(date_range(dates[0], dates[-1]), masks) if mask and d in wanted]
+
+    return cached_availability(user.id, f"days:{dates[0]}:{dates[-1]}:{tz or ''}", compute)
+
+
+def bookable_days(user, dates, booking, tz=None):
+    """Map each of ``dates`` to its bookable slots for the ``booking`` parameters."""
+    if not dates:
+        return {}
+
+    def compute():
+        masks = dict(zip(date_range(dates[0], dates[-1]), available_masks(user, dates[0], dates[-1], tz)))
+        slots = bookable_slots([masks[d] for d in dates], **booking)
+        return {str(d): day_slots for d, day_slots in zip(dates, slots)}
+
+    params = ":".join(str(booking[name]) for name in sorted(booking))
+    return cached_availability(user.id, f"bookable:{dates[0]}:{dates[-1]}:{params}:{tz or ''}", compute)
+
+
+def heatmap(user, start_date, num_days, tz=None):
+    return cached_availability(
+        user.id,
+        f"heatmap:{start_date}:{num_days}:{tz or ''}",
+        lambda: availability_heatmap(user, start_date, num_days, tz),
+    )
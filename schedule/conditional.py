@@ -0,0 +1,46 @@
+import hashlib
+from django.conf import settings
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+from .cache import meeting_version, schedule_version
+
+AVAILABILITY_MAX_AGE = getattr(settings, "AVAILABILITY_MAX_AGE", 30)
+
+
+def availability_etag(request, user_id, today):
+    """
+    A strong ETag for an availability response, built only from the host's
+    schedule and meeting versions, the query and the current date, so it can
+    be checked without computing any slots. None when the cache cannot keep
+    versions, since nothing would then tell a stale response from a fresh one.
+    """
+    versions = (schedule_version(user_id), meeting_version(user_id))
+    if None in versions:
+        return None
+    query = "&".join(f"{key}={value}" for key, value in sorted(request.query_params.items()))
+    state = f"{request.resolver_match.url_name}:{user_id}:{versions[0]}:{versions[1]}:{today}:{query}"
+    return quote_etag(hashlib.sha1(state.encode()).hexdigest())
+
+
+def is_not_modified(request, etag):
+    if_none_match = request.headers.get("If-None-Match")
+    if not if_none_match or etag is None:
+        return False
+    etags = parse_etags(if_none_match)
+    return "*" in etags or etag in etags
+
+
+def with_validators(response, etag):
+    if etag is None:
+        return response
+    response["ETag"] = etag
+    # Responses vary by caller, so a shared cache keys them per Authorization
+    # header and revalidates with the ETag once max-age runs out.
+    patch_cache_control(response, public=True, max_age=AVAILABILITY_MAX_AGE, must_revalidate=True)
+    patch_vary_headers(response, ["Authorization"])
+    return response
+
+
+def not_modified(etag):
+    return with_validators(HttpResponseNotModified(), etag)
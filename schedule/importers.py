@@ -0,0 +1,248 @@
+import csv
+from collections import namedtuple
+from datetime import datetime as dt, timedelta, timezone as dt_timezone
+from django.db import DatabaseError, transaction
+from .cache import bump_schedule_version
+from .intervals import DAY_MINUTES, DayMask, minute_of, time_from_str
+from .models import WEEKDAY_MAP
+from .storage import ScheduleWriter
+from .timezones import get_zone
+
+IMPORT_CHUNK_DAYS = 200
+MAX_REPORTED_ERRORS = 100
+MAX_EVENT_DAYS = 366
+
+# ``weekday`` is set instead of ``day`` for rows describing the repeating
+# template; ``mask`` holds the minutes the row is about.
+ImportRow = namedtuple("ImportRow", ["line", "available", "day", "weekday", "mask"])
+RowError = namedtuple("RowError", ["line", "error"])
+
+
+def _row_mask(start_str, end_str):
+    if not start_str and not end_str:
+        return DayMask.full()
+    if not start_str or not end_str:
+        raise ValueError("start_time and end_time must both be set or both be empty")
+    start = minute_of(time_from_str(start_str))
+    end = minute_of(time_from_str(end_str), is_end=True)
+    if start >= end:
+        raise ValueError("start_time must be before end_time")
+    return DayMask.from_minutes([(start, end)])
+
+
+def parse_csv(lines, tz=None):
+    """
+    Read ``date,start_time,end_time,status`` rows. ``date`` is either
+    YYYY-MM-DD or a weekday name, ``status`` is ``available`` (the default) or
+    ``unavailable``, and empty times cover the whole day. Times are the host's
+    wall clock, so ``tz`` is not needed.
+    """
+    reader = csv.DictReader(lines)
+    missing = {"date"} - set(reader.fieldnames or ())
+    if missing:
+        yield RowError(1, "missing column: date")
+        return
+    for record in reader:
+        line = reader.line_num
+        try:
+            status = (record.get("status") or "available").strip().lower()
+            if status not in ("available", "unavailable"):
+                raise ValueError(f"unknown status {status!r}")
+            mask = _row_mask((record.get("start_time") or "").strip(), (record.get("end_time") or "").strip())
+            when = (record.get("date") or "").strip().lower()
+            if when in WEEKDAY_MAP:
+                yield ImportRow(line, status == "available", None, when, mask)
+            else:
+                yield ImportRow(line, status == "available", dt.strptime(when, "%Y-%m-%d").date(), None, mask)
+        except (TypeError, ValueError) as e:
+            yield RowError(line, str(e))
+
+
+def _unfold(lines):
+    # RFC 5545 continues long content lines on lines starting with whitespace.
+    current, start_line = None, 0
+    for number, raw in enumerate(lines, start=1):
+        raw = raw.rstrip("\r\n")
+        if raw[:1] in (" ", "\t") and current is not None:
+            current += raw[1:]
+            continue
+        if current is not None:
+            yield start_line, current
+        current, start_line = raw, number
+    if current is not None:
+        yield start_line, current
+
+
+def _ics_value(prop, tz):
+    """
+    A DATE value as a date, or a DATE-TIME as a naive datetime on ``tz``'s
+    wall clock. UTC (``Z``) and ``TZID`` times are converted; floating times
+    are already the host's wall clock.
+    """
+    params, value = prop
+    value = value.strip()
+    if len(value) == 8:
+        return dt.strptime(value, "%Y%m%d").date()
+    moment = dt.strptime(value[:-1] if value.endswith("Z") else value, "%Y%m%dT%H%M%S")
+    if value.endswith("Z"):
+        source = dt_timezone.utc
+    elif "TZID" in params:
+        source = get_zone(params["TZID"])
+    else:
+        return moment
+    return moment.replace(tzinfo=source).astimezone(get_zone(tz)).replace(tzinfo=None)
+
+
+def _event_rows(line, props, tz):
+    if "RRULE" in props:
+        raise ValueError("recurring events (RRULE) are not supported")
+    if "DTSTART" not in props:
+        raise ValueError("event has no DTSTART")
+    available = props.get("TRANSP", ({}, ""))[1].upper() == "TRANSPARENT"
+    start = _ics_value(props["DTSTART"], tz)
+
+    if not isinstance(start, dt):
+        end = _ics_value(props["DTEND"], tz) if "DTEND" in props else start + timedelta(days=1)
+        if isinstance(end, dt) or end <= start or (end - start).days > MAX_EVENT_DAYS:
+            raise ValueError("invalid all-day event range")
+        return [ImportRow(line, available, start + timedelta(days=n), None, DayMask.full()) for n in range((end - start).days)]
+
+    if "DTEND" not in props:
+        raise ValueError("timed event has no DTEND")
+    end = _ics_value(props["DTEND"], tz)
+    if not isinstance(end, dt) or end <= start or (end.date() - start.date()).days > MAX_EVENT_DAYS:
+        raise ValueError("invalid event range")
+    rows, day = [], start.date()
+    while day <= end.date():
+        first = start.hour * 60 + start.minute if day == start.date() else 0
+        last = end.hour * 60 + end.minute if day == end.date() else DAY_MINUTES
+        if first < last:
+            rows.append(ImportRow(line, available, day, None, DayMask.from_minutes([(first, last)])))
+        day += timedelta(days=1)
+    return rows
+
+
+def parse_ics(lines, tz="UTC"):
+    """
+    Read VEVENTs as blocked time, or as available time when marked
+    ``TRANSP:TRANSPARENT``. UTC and ``TZID`` times are moved to the host's
+    zone ``tz``, splitting events that then cross midnight; floating times
+    are taken as the host's wall clock.
+    """
+    props, event_line = None, 0
+    for line, content in _unfold(lines):
+        upper = content.upper()
+        if upper == "BEGIN:VEVENT":
+            props, event_line = {}, line
+        elif upper == "END:VEVENT" and props is not None:
+            try:
+                yield from _event_rows(event_line, props, tz)
+            except (KeyError, ValueError) as e:
+                yield RowError(event_line, str(e))
+            props = None
+        elif props is not None and ":" in content:
+            name, value = content.split(":", 1)
+            name, *params = name.split(";")
+            params = {key.upper(): item.strip('"') for key, _, item in (param.partition("=") for param in params)}
+            props.setdefault(name.upper(), (params, value))
+
+
+PARSERS = {
+    "csv": parse_csv,
+    "ics": parse_ics,
+}
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.applied = 0
+        self.chunks = 0
+        self.error_count = 0
+        self.errors = []
+        self.changes = {"created": 0, "updated": 0, "deleted": 0}
+
+    def error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    def as_dict(self):
+        return {
+            "rows": self.rows,
+            "applied": self.applied,
+            "chunks": self.chunks,
+            "changes": self.changes,
+            "error_count": self.error_count,
+            "errors": self.errors,
+        }
+
+
+def _apply(user_id, rows, dates, opened, weekdays, weekday_lines, report):
+    lines = weekday_lines + [row.line for row in rows]
+    try:
+        with transaction.atomic():
+            writer = ScheduleWriter(user_id, dates)
+            if weekday_lines:
+                for day_name, (available, blocked) in weekdays.items():
+                    writer.set_repeating_day(day_name, ~available | blocked)
+            for row in rows:
+                if not row.available:
+                    writer.block_day(row.day, row.mask)
+                elif row.day in opened:
+                    writer.open_day(row.day, row.mask)
+                else:
+                    writer.set_day(row.day, ~row.mask)
+                    opened.add(row.day)
+            changes = writer.flush()
+            bump_schedule_version(user_id)
+    except DatabaseError as e:
+        for line in lines:
+            report.error(line, f"not saved: {e}")
+        return
+    report.chunks += 1
+    report.applied += len(lines)
+    for key, count in changes.items():
+        report.changes[key] += count
+
+
+def import_schedule(user_id, rows, chunk_days=IMPORT_CHUNK_DAYS):
+    """
+    Apply parsed ``rows`` to a user's schedule, ``chunk_days`` dates per
+    transaction, and return a report of what was written and which rows failed.
+
+    Weekday rows build up the repeating template: each weekday ends up
+    available in the union of its available windows minus its unavailable
+    ones, and the template is written ahead of the dated rows of the chunk it
+    was last changed in. Dated rows then apply in file order. The first
+    available row for a date replaces that date with its window and later
+    ones widen it; unavailable rows block their window on top of the date's
+    template or override.
+    """
+    report = ImportReport()
+    chunk, chunk_dates, opened = [], set(), set()
+    weekdays, weekday_lines = {}, []
+
+    for row in rows:
+        report.rows += 1
+        if isinstance(row, RowError):
+            report.error(row.line, row.error)
+            continue
+        if row.weekday:
+            available, blocked = weekdays.get(row.weekday, (DayMask(), DayMask()))
+            if row.available:
+                available |= row.mask
+            else:
+                blocked |= row.mask
+            weekdays[row.weekday] = (available, blocked)
+            weekday_lines.append(row.line)
+            continue
+        if row.day not in chunk_dates and len(chunk_dates) >= chunk_days:
+            _apply(user_id, chunk, chunk_dates, opened, weekdays, weekday_lines, report)
+            chunk, chunk_dates, weekday_lines = [], set(), []
+        chunk.append(row)
+        chunk_dates.add(row.day)
+
+    if chunk or weekday_lines:
+        _apply(user_id, chunk, chunk_dates, opened, weekdays, weekday_lines, report)
+    return report
@@ -0,0 +1,198 @@
+from datetime import time, datetime as dt
+from functools import lru_cache
+
+DAY_MINUTES = 24 * 60
+END_OF_DAY = time(23, 59)
+
+
+def time_from_str(t_str):
+    t_str = t_str.strip()
+    if t_str.startswith("24:"):
+        return time(23, 59)
+    try:
+        hour, minute = map(int, t_str.split(":"))
+        if hour > 23 or minute > 59:
+            raise ValueError("Hour must be 0-23 and minute 0-59")
+        return time(hour, minute)
+    except ValueError:
+        dt_obj = dt.strptime(t_str, "%I:%M %p")
+        return time(dt_obj.hour, dt_obj.minute)
+
+
+def minute_of(t, is_end=False):
+    # 23:59 is how the schedule spells "end of day", so as an end bound it
+    # covers the final minute as well.
+    if is_end and t >= END_OF_DAY:
+        return DAY_MINUTES
+    return t.hour * 60 + t.minute
+
+
+def time_of(minute):
+    if minute >= DAY_MINUTES:
+        return END_OF_DAY
+    return time(minute // 60, minute % 60)
+
+
+def span_bits(start, end):
+    if end <= start:
+        return 0
+    return ((1 << (end - start)) - 1) << start
+
+
+class DayMask:
+    """
+    One day of availability as a 1440-bit integer, bit ``n`` standing for the
+    minute starting at ``n`` minutes past midnight.
+
+    Union, intersection and subtraction are single integer operations, so
+    combining a template, its overrides and any bookings costs the same no
+    matter how many intervals each side holds.
+    """
+
+    __slots__ = ("bits",)
+
+    def __init__(self, bits=0):
+        self.bits = bits & FULL_DAY_BITS
+
+    @classmethod
+    def full(cls):
+        return cls(FULL_DAY_BITS)
+
+    @classmethod
+    def from_minutes(cls, intervals):
+        bits = 0
+        for start, end in intervals:
+            bits |= span_bits(max(start, 0), min(end, DAY_MINUTES))
+        return cls(bits)
+
+    @classmethod
+    def from_times(cls, intervals):
+        return cls.from_minutes((minute_of(start), minute_of(end, is_end=True)) for start, end in intervals)
+
+    @classmethod
+    def from_rows(cls, rows):
+        return cls.from_times((row.start_time, row.end_time) for row in rows)
+
+    def __or__(self, other):
+        return DayMask(self.bits | other.bits)
+
+    def __and__(self, other):
+        return DayMask(self.bits & other.bits)
+
+    def __sub__(self, other):
+        return DayMask(self.bits & ~other.bits)
+
+    def __invert__(self):
+        return DayMask(~self.bits)
+
+    def __eq__(self, other):
+        return isinstance(other, DayMask) and self.bits == other.bits
+
+    def __hash__(self):
+        return hash(self.bits)
+
+    def __bool__(self):
+        return self.bits != 0
+
+    def __repr__(self):
+        return f"DayMask({self.intervals()!r})"
+
+    def contains(self, start, end):
+        window = span_bits(start, end)
+        return window != 0 and self.bits & window == window
+
+    def free_minutes(self):
+        return bin(self.bits).count("1")
+
+    def first_free(self):
+        """The first available minute of the day, or None."""
+        return (self.bits & -self.bits).bit_length() - 1 if self.bits else None
+
+    def intervals(self):
+        """Return the set runs as ``(start_minute, end_minute)`` pairs."""
+        runs = []
+        bits = self.bits
+        offset = 0
+        while bits:
+            skip = (bits & -bits).bit_length() - 1
+            bits >>= skip
+            offset += skip
+            length = (bits ^ (bits + 1)).bit_length() - 1
+            runs.append((offset, offset + length))
+            bits >>= length
+            offset += length
+        return runs
+
+    def time_intervals(self):
+        return [(time_of(start), time_of(end)) for start, end in self.intervals()]
+
+    def slots(self):
+        return [slot_of(start, end) for start, end in self.intervals()]
+
+
+def slot_of(start, end):
+    return {
+        "start_time": str(time_of(start)),
+        "end_time": "23:59" if end >= DAY_MINUTES else str(time_of(end)),
+    }
+
+
+FULL_DAY_BITS = (1 << DAY_MINUTES) - 1
+
+
+def pack_days(masks):
+    """Lay consecutive DayMasks end to end in one integer, day ``i`` at bit ``i * 1440``."""
+    bits = 0
+    for offset, mask in enumerate(masks):
+        bits |= mask.bits << (offset * DAY_MINUTES)
+    return bits
+
+
+def unpack_days(bits, num_days):
+    return [DayMask(bits >> (offset * DAY_MINUTES)) for offset in range(num_days)]
+
+
+def erode(bits, length):
+    """Keep bit ``n`` only where bits ``n`` .. ``n + length - 1`` are all set."""
+    covered = 1
+    while covered < length:
+        shift = min(covered, length - covered)
+        bits &= bits >> shift
+        covered += shift
+    return bits
+
+
+@lru_cache(maxsize=64)
+def start_grid(num_days, duration, step, buffer_before, buffer_after):
+    """Packed bits of every allowed start minute: on the step grid, with the buffered window inside the day."""
+    day = 0
+    for minute in range(buffer_before, DAY_MINUTES - duration - buffer_after + 1):
+        if minute % step == 0:
+            day |= 1 << minute
+    bits, filled = day, 1
+    while filled < num_days:
+        bits |= bits << (filled * DAY_MINUTES)
+        filled *= 2
+    return bits & ((1 << (num_days * DAY_MINUTES)) - 1)
+
+
+def bookable_starts(masks, duration, step=None, buffer_before=0, buffer_after=0):
+    """
+    Return, for each DayMask in ``masks``, the start minutes at which a
+    ``duration``-minute booking fits with its buffers free on either side.
+
+    The whole range is packed into one integer and eroded with O(log window)
+    shifts, so the cost hardly depends on how many days or slots there are.
+    """
+    masks = list(masks)
+    step = step or duration
+    starts = erode(pack_days(masks), buffer_before + duration + buffer_after) << buffer_before
+    starts &= start_grid(len(masks), duration, step, buffer_before, buffer_after)
+
+    by_day = [[] for _ in masks]
+    while starts:
+        low = starts & -starts
+        position = low.bit_length() - 1
+        by_day[position // DAY_MINUTES].append(position % DAY_MINUTES)
+        starts ^= low
+    return by_day
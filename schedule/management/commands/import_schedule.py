@@ -0,0 +1,30 @@
+import json
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from schedule.availability import host_timezone
+from schedule.importers import IMPORT_CHUNK_DAYS, PARSERS, import_schedule
+
+
+class Command(BaseCommand):
+    help = "Import a CSV or ICS availability file into a user's schedule."
+
+    def add_arguments(self, parser):
+        parser.add_argument("user", help="username or id of the host")
+        parser.add_argument("path", help="CSV or ICS file to import")
+        parser.add_argument("--type", choices=sorted(PARSERS), help="file format (defaults to the file extension)")
+        parser.add_argument("--chunk-days", type=int, default=IMPORT_CHUNK_DAYS, help="dates written per transaction")
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options["user"]).first()
+        if user is None and options["user"].isdigit():
+            user = User.objects.filter(pk=int(options["user"])).first()
+        if user is None:
+            raise CommandError(f"No user {options['user']!r}")
+
+        kind = (options["type"] or options["path"].rsplit(".", 1)[-1]).lower()
+        if kind not in PARSERS:
+            raise CommandError("Use --type csv or --type ics")
+
+        with open(options["path"], encoding="utf-8-sig", errors="replace", newline="") as f:
+            report = import_schedule(user.id, PARSERS[kind](f, host_timezone(user.id)), chunk_days=options["chunk_days"])
+        self.stdout.write(json.dumps(report.as_dict(), indent=2))
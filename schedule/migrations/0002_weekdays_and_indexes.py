@@ -0,0 +1,39 @@
+# Generated by Django 4.2.21 on 2026-10-18 18:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+
+def backfill_weekdays(apps, schema_editor):
+    Days = apps.get_model('schedule', 'Days')
+    rows = Days.objects.filter(is_repeating=True).exclude(available_repeating_days__isnull=True).only('id', 'available_repeating_days')
+    updated = []
+    for row in rows.iterator(chunk_size=2000):
+        names = {d.strip().lower() for d in row.available_repeating_days.split(",")}
+        row.weekdays = sum(1 << WEEKDAYS.index(name) for name in names if name in WEEKDAYS)
+        if row.weekdays:
+            updated.append(row)
+    Days.objects.bulk_update(updated, ['weekdays'], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schedule', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='days',
+            name='weekdays',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_weekdays, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='days',
+            index=models.Index(fields=['user', 'is_repeating', 'day'], name='days_user_repeating_day_idx'),
+        ),
+    ]
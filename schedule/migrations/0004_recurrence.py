@@ -0,0 +1,23 @@
+# Generated by Django 4.2.21 on 2026-10-18 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schedule', '0003_hostprofile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='days',
+            name='rrule',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='days',
+            name='until',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
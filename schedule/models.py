@@ -1,13 +1,55 @@
 from django.db import models
 from django.contrib.auth.models import User
+from .recurrence import last_occurrence, parse_rrule
+
+WEEKDAY_MAP = {
+    "monday": 0,
+    "tuesday": 1,
+    "wednesday": 2,
+    "thursday": 3,
+    "friday": 4,
+    "saturday": 5,
+    "sunday": 6,
+}
+
+def weekday_bits(available_repeating_days):
+    if not available_repeating_days:
+        return 0
+    bits = 0
+    for day_name in available_repeating_days.split(","):
+        day_name = day_name.strip().lower()
+        if day_name in WEEKDAY_MAP:
+            bits |= 1 << WEEKDAY_MAP[day_name]
+    return bits
 
 class Days(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='days')
     day = models.DateField(null=True, blank=True)
     available_repeating_days = models.TextField(null=True, blank=True)  
+    # Bit n is set when the entry repeats on weekday n (Monday is 0), mirroring available_repeating_days.
+    weekdays = models.PositiveSmallIntegerField(default=0)
     is_repeating = models.BooleanField(default=False)
+    # Repeating rows with an RRULE (e.g. FREQ=WEEKLY;INTERVAL=2;BYDAY=MO) apply their Time rows on the
+    # dates the rule falls on, starting at ``day``. ``until`` is the rule's last date, None when it never ends.
+    rrule = models.TextField(null=True, blank=True)
+    until = models.DateField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'is_repeating', 'day'], name='days_user_repeating_day_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.weekdays = weekday_bits(self.available_repeating_days)
+        self.until = last_occurrence(parse_rrule(self.rrule), self.day) if self.rrule else None
+        super().save(*args, **kwargs)
 
 class Time(models.Model):
     day = models.ForeignKey(Days, on_delete=models.CASCADE, related_name='times')
     start_time = models.TimeField(null=True, blank=True)
-    end_time = models.TimeField(null=True, blank=True)
\ No newline at end of file
+    end_time = models.TimeField(null=True, blank=True)
+
+class HostProfile(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='host_profile')
+    # IANA name; Days/Time rows are wall-clock times in this zone.
+    timezone = models.CharField(max_length=64, default='UTC')
@@ -0,0 +1,248 @@
+import calendar
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+# A subset of RFC 5545 RRULE: FREQ (DAILY, WEEKLY or MONTHLY), INTERVAL,
+# BYDAY (with an ordinal such as 1MO or -1FR for MONTHLY), BYMONTHDAY,
+# COUNT and UNTIL. Weeks start on Monday. Rules are stored as text on Days
+# and only ever expanded over the dates a request asks about.
+
+BYDAY_CODES = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY")
+# Far enough out for any real schedule while leaving room to step a period
+# past it without overflowing ``date``.
+LAST_DATE = date(9000, 12, 31)
+MAX_INTERVAL = 1000
+# COUNT rules are walked from their start, so their length is bounded.
+MAX_COUNT = 5000
+# The Gregorian calendar repeats every 400 years, so a rule that has not
+# fallen on a date within that many days of its start never will.
+CALENDAR_CYCLE = timedelta(days=146097)
+
+
+class Recurrence(NamedTuple):
+    freq: str
+    interval: int = 1
+    # (ordinal or None, weekday) pairs; the ordinal picks the nth weekday of the month.
+    byday: Tuple[Tuple[Optional[int], int], ...] = ()
+    bymonthday: Tuple[int, ...] = ()
+    count: Optional[int] = None
+    until: Optional[date] = None
+
+
+def _int(name, value):
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {value!r}")
+
+
+def _byday(value, freq):
+    code, ordinal = value[-2:].upper(), value[:-2]
+    if code not in BYDAY_CODES:
+        raise ValueError(f"Unknown BYDAY value {value!r}")
+    if not ordinal:
+        return None, BYDAY_CODES[code]
+    if freq != "MONTHLY":
+        raise ValueError("BYDAY ordinals are only allowed with FREQ=MONTHLY")
+    ordinal = _int("BYDAY ordinal", ordinal)
+    if ordinal == 0 or not -5 <= ordinal <= 5:
+        raise ValueError(f"BYDAY ordinal out of range in {value!r}")
+    return ordinal, BYDAY_CODES[code]
+
+
+@lru_cache(maxsize=1024)
+def parse_rrule(text):
+    """Parse ``FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE`` (an optional ``RRULE:`` prefix is ignored)."""
+    if not text or not text.strip():
+        raise ValueError("Empty recurrence rule")
+    text = text.strip()
+    if text.upper().startswith("RRULE:"):
+        text = text[6:]
+    parts = {}
+    for part in text.split(";"):
+        name, _, value = part.partition("=")
+        if not value:
+            raise ValueError(f"Malformed recurrence rule part {part!r}")
+        parts[name.strip().upper()] = value.strip()
+
+    freq = parts.pop("FREQ", "").upper()
+    if freq not in FREQUENCIES:
+        raise ValueError(f"FREQ must be one of {', '.join(FREQUENCIES)}")
+    interval = _int("INTERVAL", parts.pop("INTERVAL", "1"))
+    if not 1 <= interval <= MAX_INTERVAL:
+        raise ValueError(f"INTERVAL must be between 1 and {MAX_INTERVAL}")
+    byday = tuple(_byday(value, freq) for value in parts.pop("BYDAY", "").split(",") if value)
+    bymonthday = tuple(_int("BYMONTHDAY", value) for value in parts.pop("BYMONTHDAY", "").split(",") if value)
+    if bymonthday and freq != "MONTHLY":
+        raise ValueError("BYMONTHDAY is only allowed with FREQ=MONTHLY")
+    if any(day == 0 or not -31 <= day <= 31 for day in bymonthday):
+        raise ValueError("BYMONTHDAY values must be between 1 and 31 or -31 and -1")
+    count = parts.pop("COUNT", None)
+    if count is not None:
+        count = _int("COUNT", count)
+        if not 1 <= count <= MAX_COUNT:
+            raise ValueError(f"COUNT must be between 1 and {MAX_COUNT}")
+    until = parts.pop("UNTIL", None)
+    if until is not None:
+        try:
+            until = date(int(until[:4]), int(until[4:6]), int(until[6:8]))
+        except ValueError:
+            raise ValueError(f"UNTIL must look like YYYYMMDD, got {until!r}")
+    if count is not None and until is not None:
+        raise ValueError("COUNT and UNTIL cannot both be set")
+    if parts:
+        raise ValueError(f"Unsupported recurrence rule parts: {', '.join(sorted(parts))}")
+    return Recurrence(freq, interval, byday, bymonthday, count, until)
+
+
+def _add_months(year, month, months):
+    month_index = year * 12 + month - 1 + months
+    return month_index // 12, month_index % 12 + 1
+
+
+def _month_dates(rule, dtstart, year, month):
+    num_days = calendar.monthrange(year, month)[1]
+    days = set()
+    for day in rule.bymonthday:
+        day = day if day > 0 else num_days + day + 1
+        if 1 <= day <= num_days:
+            days.add(day)
+    for ordinal, weekday in rule.byday:
+        first = (weekday - date(year, month, 1).weekday()) % 7 + 1
+        matching = list(range(first, num_days + 1, 7))
+        if ordinal is None:
+            days.update(matching)
+        elif -len(matching) <= ordinal <= len(matching):
+            days.add(matching[ordinal - 1 if ordinal > 0 else ordinal])
+    if not rule.bymonthday and not rule.byday and dtstart.day <= num_days:
+        days.add(dtstart.day)
+    return [date(year, month, day) for day in sorted(days)]
+
+
+def _periods(rule, dtstart, first_period):
+    """Yield each period's candidate dates, in order, from period ``first_period`` on."""
+    period = first_period
+    if rule.freq == "DAILY":
+        weekdays = {weekday for _, weekday in rule.byday}
+        while True:
+            day = dtstart + timedelta(days=period * rule.interval)
+            yield [day] if not weekdays or day.weekday() in weekdays else [], day
+            period += 1
+    elif rule.freq == "WEEKLY":
+        week_start = dtstart - timedelta(days=dtstart.weekday())
+        weekdays = sorted({weekday for _, weekday in rule.byday} or {dtstart.weekday()})
+        while True:
+            start = week_start + timedelta(weeks=period * rule.interval)
+            yield [start + timedelta(days=weekday) for weekday in weekdays], start
+            period += 1
+    else:
+        while True:
+            year, month = _add_months(dtstart.year, dtstart.month, period * rule.interval)
+            yield _month_dates(rule, dtstart, year, month), date(year, month, 1)
+            period += 1
+
+
+def _first_period(rule, dtstart, start_date):
+    """The last period starting on or before ``start_date``; earlier ones cannot reach the window."""
+    if rule.count is not None or start_date <= dtstart:
+        # Occurrences before the window still use up COUNT, so count from the start.
+        return 0
+    if rule.freq == "DAILY":
+        return (start_date - dtstart).days // rule.interval
+    if rule.freq == "WEEKLY":
+        return (start_date - dtstart + timedelta(days=dtstart.weekday())).days // 7 // rule.interval
+    months = (start_date.year - dtstart.year) * 12 + start_date.month - dtstart.month
+    return months // rule.interval
+
+
+def _counted_last(rule, dtstart):
+    """The date of the COUNT-th occurrence for DAILY and WEEKLY rules, which step evenly; None otherwise."""
+    if rule.freq == "DAILY" and not rule.byday:
+        return dtstart + timedelta(days=(rule.count - 1) * rule.interval)
+    if rule.freq == "DAILY":
+        # Weekdays come round every 7 periods whatever the interval.
+        weekdays = {weekday for _, weekday in rule.byday}
+        hits = [period for period in range(7) if (dtstart + timedelta(days=period * rule.interval)).weekday() in weekdays]
+        if not hits:
+            return None
+        cycles, index = divmod(rule.count - 1, len(hits))
+        return dtstart + timedelta(days=(cycles * 7 + hits[index]) * rule.interval)
+    if rule.freq == "WEEKLY":
+        weekdays = sorted({weekday for _, weekday in rule.byday} or {dtstart.weekday()})
+        first_week = [weekday for weekday in weekdays if weekday >= dtstart.weekday()]
+        week_start = dtstart - timedelta(days=dtstart.weekday())
+        if rule.count <= len(first_week):
+            return week_start + timedelta(days=first_week[rule.count - 1])
+        periods, index = divmod(rule.count - len(first_week) - 1, len(weekdays))
+        return week_start + timedelta(weeks=(periods + 1) * rule.interval, days=weekdays[index])
+    return None
+
+
+def occurrences(rule, dtstart, start_date, end_date):
+    """
+    Yield the dates ``rule`` (starting at ``dtstart``) falls on between
+    ``start_date`` and ``end_date``, in order.
+
+    Without COUNT the expansion jumps straight to the period holding
+    ``start_date`` and stops after ``end_date``, so the cost follows the
+    window rather than how long ago the rule started. DAILY and WEEKLY
+    COUNT rules are turned into their UNTIL equivalent first so they can jump too.
+    """
+    if rule.count is not None:
+        last = _counted_last(rule, dtstart)
+        if last is not None:
+            rule = rule._replace(count=None, until=last)
+    end_date = min(end_date, rule.until or end_date, LAST_DATE)
+    remaining = rule.count
+    for dates, period_start in _periods(rule, dtstart, _first_period(rule, dtstart, start_date)):
+        if period_start > end_date:
+            return
+        for day in dates:
+            if day < dtstart:
+                continue
+            if day > end_date:
+                return
+            if remaining is not None:
+                if remaining == 0:
+                    return
+                remaining -= 1
+            if day >= start_date:
+                yield day
+        if remaining == 0:
+            return
+
+
+def matches(rule, dtstart, target_date):
+    return next(occurrences(rule, dtstart, target_date, target_date), None) is not None
+
+
+def first_occurrence(rule, dtstart):
+    """The first date ``rule`` falls on, or None when it never does."""
+    rule = rule._replace(count=None)
+    if dtstart > LAST_DATE - CALENDAR_CYCLE:
+        return next(occurrences(rule, dtstart, dtstart, LAST_DATE), None)
+    return next(occurrences(rule, dtstart, dtstart, dtstart + CALENDAR_CYCLE), None)
+
+
+def last_occurrence(rule, dtstart):
+    """
+    The final date of a rule bounded by COUNT or UNTIL, or None when it never
+    ends. Raises ValueError without a start date or when the rule never falls
+    on a date, which also keeps COUNT walks from running to ``LAST_DATE``.
+    """
+    if dtstart is None:
+        raise ValueError("A recurrence rule needs a start date")
+    if first_occurrence(rule, dtstart) is None:
+        raise ValueError("The recurrence rule never falls on a date")
+    if rule.count is None and rule.until is None:
+        return None
+    if rule.count is None:
+        return rule.until
+    last = _counted_last(rule, dtstart)
+    if last is not None:
+        return last
+    for last in occurrences(rule, dtstart, dtstart, LAST_DATE):
+        pass
+    return last
@@ -0,0 +1,215 @@
+from django.db import connection
+from django.db.models import Q, Prefetch
+from .intervals import DayMask
+from .models import Days, Time, weekday_bits
+from .recurrence import last_occurrence, matches, parse_rrule
+
+
+class ScheduleWriter:
+    """
+    Buffers the schedule changes of one request and writes them in bulk.
+
+    Every Days row the request can touch (the user's repeating entries and
+    the specific-day rows for ``dates``) is loaded up front with its Time rows,
+    edits are applied to in-memory masks, and ``flush`` diffs the result against
+    the loaded Time rows so only intervals that actually changed are deleted,
+    updated or inserted, each in one bulk statement. Callers are expected to
+    run the whole thing inside ``transaction.atomic``.
+    """
+
+    def __init__(self, user_id, dates=()):
+        self.user_id = user_id
+        self.repeating_rows = []
+        self.rule_rows = []
+        self.specific_rows = {}
+        self.masks = {}
+        self.times = {}
+        self.dirty = {}
+        self.dropped_repeating = []
+        self.loaded_ids = []
+
+        entries = (
+            Days.objects
+            .filter(user_id=user_id)
+            .filter(Q(is_repeating=True) | Q(is_repeating=False, day__in=set(dates)))
+            .order_by("id")
+            .prefetch_related(Prefetch("times", queryset=Time.objects.order_by("id")))
+        )
+        for entry in entries:
+            self.loaded_ids.append(entry.pk)
+            if entry.is_repeating and entry.rrule:
+                self.rule_rows.append(entry)
+            elif entry.is_repeating:
+                self.repeating_rows.append(entry)
+            elif entry.day in self.specific_rows:
+                # Reads only ever look at the first row for a date, so later duplicates are left alone.
+                continue
+            else:
+                self.specific_rows[entry.day] = entry
+            self.times[id(entry)] = list(entry.times.all())
+            self.masks[id(entry)] = DayMask.from_rows(self.times[id(entry)])
+
+    def _new_repeating_row(self, day_name):
+        # bulk_create skips Days.save(), so the weekday bits are filled in here.
+        return Days(user_id=self.user_id, is_repeating=True, day=None, available_repeating_days=day_name, weekdays=weekday_bits(day_name))
+
+    def _new_rule_row(self, rrule, dtstart):
+        rule = parse_rrule(rrule)
+        return Days(user_id=self.user_id, is_repeating=True, day=dtstart, rrule=rrule, until=last_occurrence(rule, dtstart))
+
+    def template_mask(self, target_date):
+        weekday_bit = 1 << target_date.weekday()
+        mask = None
+        for row in self.repeating_rows:
+            if row.weekdays & weekday_bit:
+                mask = self.masks[id(row)] if mask is None else mask | self.masks[id(row)]
+        mask = DayMask.full() if mask is None else mask
+        for row in self.rule_rows:
+            if row.day and matches(parse_rrule(row.rrule), row.day, target_date):
+                mask &= self.masks[id(row)]
+        return mask
+
+    def base_mask(self, target_date):
+        """The unavailability a date starts from before a partial edit."""
+        row = self.specific_rows.get(target_date)
+        if row is not None and self.masks[id(row)]:
+            return self.masks[id(row)]
+        return self.template_mask(target_date)
+
+    def _set(self, row, mask):
+        self.masks[id(row)] = mask
+        self.dirty[id(row)] = row
+
+    def replace_repeating(self, weekday_masks):
+        """Swap all repeating entries for one row per weekday in ``weekday_masks``."""
+        self.dropped_repeating += [row for row in self.repeating_rows if row.pk]
+        self.repeating_rows = []
+        for day_name, mask in weekday_masks:
+            row = self._new_repeating_row(day_name)
+            self.repeating_rows.append(row)
+            self._set(row, mask)
+
+    def replace_rules(self, rules):
+        """Swap all recurrence rule rows for one row per ``(rrule, dtstart, mask)`` in ``rules``."""
+        self.dropped_repeating += [row for row in self.rule_rows if row.pk]
+        self.rule_rows = []
+        for rrule, dtstart, mask in rules:
+            self.add_rule(rrule, dtstart, mask)
+
+    def add_rule(self, rrule, dtstart, mask):
+        row = self._new_rule_row(rrule, dtstart)
+        self.rule_rows.append(row)
+        self._set(row, mask)
+
+    def set_repeating_day(self, day_name, mask):
+        weekday_bit = weekday_bits(day_name)
+        row = next((r for r in self.repeating_rows if r.weekdays & weekday_bit), None)
+        if row is None:
+            row = self._new_repeating_row(day_name)
+            self.repeating_rows.append(row)
+        self._set(row, mask)
+
+    def set_day(self, target_date, mask):
+        row = self.specific_rows.get(target_date)
+        if row is None:
+            row = Days(user_id=self.user_id, is_repeating=False, day=target_date)
+            self.specific_rows[target_date] = row
+        self._set(row, mask)
+
+    def block_day(self, target_date, mask):
+        self.set_day(target_date, self.base_mask(target_date) | mask)
+
+    def open_day(self, target_date, mask):
+        """Make the ``mask`` minutes of a date available on top of whatever it already allows."""
+        row = self.specific_rows.get(target_date)
+        current = self.masks[id(row)] if row is not None else self.template_mask(target_date)
+        self.set_day(target_date, current - mask)
+
+    def _save_new_rows(self, rows):
+        Days.objects.bulk_create(rows)
+        if connection.features.can_return_rows_from_bulk_insert:
+            return
+        # Backends such as MySQL don't hand back primary keys from a bulk
+        # insert, so pick the new rows up again by their natural key.
+        fresh = Days.objects.filter(user_id=self.user_id).exclude(id__in=self.loaded_ids).order_by("id")
+        by_key = {}
+        for row in fresh:
+            by_key.setdefault((row.is_repeating, row.day, row.available_repeating_days, row.rrule), []).append(row.pk)
+        for row in rows:
+            row.pk = by_key[(row.is_repeating, row.day, row.available_repeating_days, row.rrule)].pop(0)
+        self.loaded_ids.extend(row.pk for row in rows)
+
+    def _stored_times(self, row):
+        if self.times.get(id(row), []) is None:
+            self.times[id(row)] = list(Time.objects.filter(day_id=row.pk).order_by("id"))
+        return self.times.get(id(row), [])
+
+    def _diff_times(self, row):
+        """Match a row's stored Time rows against its new intervals; returns (create, update, delete)."""
+        old = self._stored_times(row)
+        wanted = self.masks[id(row)].time_intervals()
+
+        unmatched_old = []
+        remaining = {}
+        for interval in wanted:
+            remaining[interval] = remaining.get(interval, 0) + 1
+        for time_row in old:
+            key = (time_row.start_time, time_row.end_time)
+            if remaining.get(key):
+                remaining[key] -= 1
+            else:
+                unmatched_old.append(time_row)
+        unmatched_new = [interval for interval, count in remaining.items() for _ in range(count)]
+
+        # Reuse leftover rows for leftover intervals before inserting or deleting any.
+        update = []
+        for time_row, (start, end) in zip(unmatched_old, unmatched_new):
+            time_row.start_time, time_row.end_time = start, end
+            update.append(time_row)
+        create = [Time(day_id=row.pk, start_time=start, end_time=end) for start, end in unmatched_new[len(update):]]
+        return create, update, unmatched_old[len(update):]
+
+    def flush(self):
+        changes = {"created": 0, "updated": 0, "deleted": 0}
+
+        if self.dropped_repeating:
+            deleted, _ = Days.objects.filter(id__in=[row.pk for row in self.dropped_repeating]).delete()
+            changes["deleted"] += deleted
+
+        new_rows = [row for row in self.dirty.values() if not row.pk]
+        if new_rows:
+            self._save_new_rows(new_rows)
+            changes["created"] += len(new_rows)
+
+        create, update, delete = [], [], []
+        for row in self.dirty.values():
+            row_create, row_update, row_delete = self._diff_times(row)
+            create += row_create
+            update += row_update
+            delete += row_delete
+
+        if delete:
+            deleted, _ = Time.objects.filter(id__in=[time_row.pk for time_row in delete]).delete()
+            changes["deleted"] += deleted
+        if update:
+            Time.objects.bulk_update(update, ["start_time", "end_time"])
+            changes["updated"] += len(update)
+        if create:
+            Time.objects.bulk_create(create)
+            changes["created"] += len(create)
+
+        deleted_ids = {time_row.pk for time_row in delete}
+        created_by_day = {}
+        for time_row in create:
+            created_by_day.setdefault(time_row.day_id, []).append(time_row)
+        for row in self.dirty.values():
+            if create and create[0].pk is None:
+                # No ids came back from the bulk insert (MySQL); reload lazily if this writer flushes again.
+                self.times[id(row)] = None
+                continue
+            kept = [time_row for time_row in self._stored_times(row) if time_row.pk not in deleted_ids]
+            self.times[id(row)] = kept + created_by_day.get(row.pk, [])
+
+        self.dirty.clear()
+        self.dropped_repeating = []
+        return changes
@@ -1,3 +1,619 @@
-from django.test import TestCase
+import json
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from meeting.models import Meeting
+from .availability import collective_availability, date_range, load_schedule
+from .cache import schedule_version
+from .importers import import_schedule, parse_ics
+from .intervals import DayMask, bookable_starts, pack_days
+from .models import Days, HostProfile, Time, WEEKDAY_MAP
+from .recurrence import last_occurrence, occurrences, parse_rrule
+from .timezones import convert_days, get_zone, year_transitions
+from .views import MAX_BATCH_USERS
 
-# Create your tests here.
+
+def create_weekly_schedule(user, start=time(9, 0), end=time(17, 0), weekdays=("monday", "tuesday", "wednesday", "thursday", "friday")):
+    for day_name in weekdays:
+        day_obj = Days.objects.create(user=user, is_repeating=True, available_repeating_days=day_name)
+        Time.objects.create(day=day_obj, start_time=time(0, 0), end_time=start)
+        Time.objects.create(day=day_obj, start_time=end, end_time=time(23, 59))
+
+
+# Without CACHE_URL nothing is cached; tests that exercise caching use a
+# per-process cache, which is fine with a single test process.
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+class DayMaskTests(SimpleTestCase):
+    def test_set_operations(self):
+        morning = DayMask.from_times([(time(9, 0), time(12, 0))])
+        late = DayMask.from_times([(time(11, 0), time(14, 0))])
+        self.assertEqual((morning | late).intervals(), [(540, 840)])
+        self.assertEqual((morning & late).intervals(), [(660, 720)])
+        self.assertEqual((morning - late).intervals(), [(540, 660)])
+
+    def test_end_of_day_covers_last_minute(self):
+        self.assertEqual(DayMask.from_times([(time(0, 0), time(23, 59))]), DayMask.full())
+        self.assertEqual((~DayMask.from_times([(time(0, 0), time(22, 0))])).slots(), [{"start_time": "22:00:00", "end_time": "23:59"}])
+
+    def test_bookable_starts_respect_buffers_and_day_edges(self):
+        day = DayMask.from_minutes([(540, 1020)])
+        starts = bookable_starts([day, DayMask(), DayMask.full()], 60, step=30, buffer_before=15)
+        self.assertEqual(starts[0][0], 570)
+        self.assertEqual(starts[0][-1], 960)
+        self.assertEqual(starts[1], [])
+        self.assertEqual(starts[2][-1], 1380)
+
+    def test_contains(self):
+        mask = DayMask.from_minutes([(60, 120)])
+        self.assertTrue(mask.contains(60, 120))
+        self.assertFalse(mask.contains(90, 150))
+
+
+class TimezoneConversionTests(SimpleTestCase):
+    def convert(self, host_tz, viewer_tz, first, num_days):
+        host_start = first - timedelta(days=2)
+        bits = pack_days([DayMask.from_times([(time(9, 0), time(17, 0))])] * (num_days + 4))
+        return [mask.slots() for mask in convert_days(bits, host_start, host_tz, first, num_days, viewer_tz)]
+
+    def test_transitions_are_found_to_the_minute(self):
+        starts, offsets, _ = year_transitions("Europe/London", 2030)
+        self.assertEqual(offsets, (0, 60, 0))
+        self.assertEqual(datetime.fromtimestamp(starts[1] * 60, dt_timezone.utc), datetime(2030, 3, 31, 1, tzinfo=dt_timezone.utc))
+
+    def test_shift_follows_each_zones_dst(self):
+        # New York moves to EDT on 10 March, London only on 31 March.
+        days = self.convert("America/New_York", "Europe/London", date(2030, 3, 8), 4)
+        self.assertEqual(days[0], [{"start_time": "14:00:00", "end_time": "22:00:00"}])
+        self.assertEqual(days[3], [{"start_time": "13:00:00", "end_time": "21:00:00"}])
+
+    def test_days_split_across_midnight(self):
+        days = self.convert("America/New_York", "Asia/Tokyo", date(2030, 1, 8), 1)
+        self.assertEqual(days[0], [
+            {"start_time": "00:00:00", "end_time": "07:00:00"},
+            {"start_time": "23:00:00", "end_time": "23:59"},
+        ])
+
+    def test_unknown_zone(self):
+        with self.assertRaises(ValueError):
+            get_zone("Mars/Olympus")
+
+
+class AvailabilityEngineTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="host", password="pass")
+        create_weekly_schedule(self.user)
+        # 2030-01-07 is a Monday.
+        self.monday = date(2030, 1, 7)
+
+    def test_repeating_day_slots(self):
+        snapshot = load_schedule(self.user, self.monday, self.monday)
+        self.assertEqual(snapshot.available_slots(self.monday), [{"start_time": "09:00:00", "end_time": "17:00:00"}])
+
+    def test_day_without_repeating_entry_is_unavailable(self):
+        sunday = self.monday - timedelta(days=1)
+        snapshot = load_schedule(self.user, sunday, sunday)
+        self.assertEqual(snapshot.available_slots(sunday), [])
+
+    def test_specific_day_overrides_repeating_entry(self):
+        override = Days.objects.create(user=self.user, is_repeating=False, day=self.monday)
+        Time.objects.create(day=override, start_time=time(0, 0), end_time=time(12, 0))
+        snapshot = load_schedule(self.user, self.monday, self.monday + timedelta(days=1))
+        self.assertEqual(snapshot.available_slots(self.monday), [{"start_time": "12:00:00", "end_time": "23:59"}])
+        self.assertEqual(snapshot.available_slots(self.monday + timedelta(days=1)), [{"start_time": "09:00:00", "end_time": "17:00:00"}])
+
+    def test_query_count_is_constant_over_range(self):
+        for offset in range(0, 120, 3):
+            override = Days.objects.create(user=self.user, is_repeating=False, day=self.monday + timedelta(days=offset))
+            Time.objects.create(day=override, start_time=time(0, 0), end_time=time(23, 59))
+
+        for length in (1, 31, 120):
+            end_date = self.monday + timedelta(days=length - 1)
+            with self.assertNumQueries(3):
+                snapshot = load_schedule(self.user, self.monday, end_date)
+                dates = [self.monday + timedelta(days=i) for i in range(length)]
+                snapshot.available_days(dates)
+
+    def test_no_validators_without_a_cache(self):
+        # The default settings cache nothing, so there are no versions to build
+        # an ETag from; responses must not advertise one that never matches.
+        self.assertIsNone(schedule_version(self.user.id))
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = f"/api/schedule/monthly/open/{self.user.id}"
+        response = client.get(url, {"year": 2030, "month": 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response)
+        self.assertNotIn("Cache-Control", response)
+        self.assertEqual(client.get(url, {"year": 2030, "month": 1}, HTTP_IF_NONE_MATCH="*").status_code, 200)
+
+        response = client.get("/api/meeting/export")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response)
+
+    def test_meetings_are_subtracted(self):
+        # Pending requests hold their slot just like approved meetings.
+        tuesday = self.monday + timedelta(days=1)
+        Meeting.objects.create(user=self.user, day=tuesday, start_time=time(10), end_time=time(11), active=True)
+        Meeting.objects.create(user=self.user, day=tuesday, start_time=time(13), end_time=time(14), active=False)
+        snapshot = load_schedule(self.user, self.monday, tuesday)
+        expected = [(540, 600), (660, 780), (840, 1020)]
+        self.assertEqual(snapshot.available_mask(tuesday).intervals(), expected)
+        bits = snapshot.range_bits(self.monday, tuesday)
+        self.assertEqual(bits >> 1440, snapshot.available_mask(tuesday).bits)
+        self.assertEqual(collective_availability([self.user.id], tuesday, tuesday)[0][1].intervals(), expected)
+
+
+class RecurrenceTests(SimpleTestCase):
+    def expand(self, rrule, dtstart, start, end):
+        return [str(d) for d in occurrences(parse_rrule(rrule), dtstart, start, end)]
+
+    def test_expands_only_the_window(self):
+        self.assertEqual(
+            self.expand("FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE", date(2000, 1, 3), date(2030, 1, 1), date(2030, 1, 20)),
+            ["2030-01-07", "2030-01-09"],
+        )
+        self.assertEqual(
+            self.expand("FREQ=MONTHLY;BYDAY=-1FR", date(2030, 1, 1), date(2030, 2, 1), date(2030, 3, 31)),
+            ["2030-02-22", "2030-03-29"],
+        )
+        self.assertEqual(
+            self.expand("FREQ=MONTHLY;BYMONTHDAY=31", date(2030, 1, 1), date(2030, 1, 1), date(2030, 5, 31)),
+            ["2030-01-31", "2030-03-31", "2030-05-31"],
+        )
+        self.assertEqual(self.expand("FREQ=DAILY;INTERVAL=3;UNTIL=20300110", date(2030, 1, 1), date(2030, 1, 2), date(2030, 2, 1)), [
+            "2030-01-04", "2030-01-07", "2030-01-10",
+        ])
+
+    def test_count_includes_occurrences_before_the_window(self):
+        rule = parse_rrule("FREQ=WEEKLY;COUNT=3")
+        self.assertEqual(self.expand("FREQ=WEEKLY;COUNT=3", date(2030, 1, 7), date(2030, 1, 10), date(2030, 12, 31)), [
+            "2030-01-14", "2030-01-21",
+        ])
+        self.assertEqual(last_occurrence(rule, date(2030, 1, 7)), date(2030, 1, 21))
+        self.assertIsNone(last_occurrence(parse_rrule("FREQ=DAILY"), date(2030, 1, 7)))
+        self.assertEqual(last_occurrence(parse_rrule("FREQ=DAILY;INTERVAL=2;COUNT=5000"), date(2030, 1, 1)), date(2030, 1, 1) + timedelta(days=9998))
+        self.assertEqual(last_occurrence(parse_rrule("FREQ=WEEKLY;BYDAY=MO,FR;COUNT=3"), date(2030, 1, 9)), date(2030, 1, 18))
+
+    def test_counted_daily_weekday_rules_match_the_expansion(self):
+        for text in ("FREQ=DAILY;BYDAY=MO,WE,FR;COUNT=10", "FREQ=DAILY;INTERVAL=3;BYDAY=SA;COUNT=4", "FREQ=DAILY;INTERVAL=14;BYDAY=MO;COUNT=3"):
+            rule = parse_rrule(text)
+            expanded = list(occurrences(rule._replace(count=None), date(2030, 1, 7), date(2030, 1, 7), date(2031, 12, 31)))
+            self.assertEqual(last_occurrence(rule, date(2030, 1, 7)), expanded[rule.count - 1], text)
+
+    def test_rejects_rules_that_never_fall_on_a_date(self):
+        # 2030-01-07 is a Monday: every 7th day is a Monday too, and February never has a 30th.
+        for text in ("FREQ=DAILY;INTERVAL=7;BYDAY=TU;COUNT=5", "FREQ=MONTHLY;INTERVAL=12;BYMONTHDAY=30;COUNT=5000", "FREQ=WEEKLY;UNTIL=20300101"):
+            with self.assertRaisesMessage(ValueError, "never falls on a date"):
+                last_occurrence(parse_rrule(text), date(2030, 2, 4) if "MONTHLY" in text else date(2030, 1, 7))
+        with self.assertRaisesMessage(ValueError, "needs a start date"):
+            Days(user_id=1, is_repeating=True, rrule="FREQ=WEEKLY;COUNT=3").save()
+
+    def test_rejects_unsupported_rules(self):
+        for text in ("FREQ=YEARLY", "FREQ=DAILY;COUNT=1000000000", "FREQ=WEEKLY;BYDAY=1MO", "FREQ=DAILY;INTERVAL=0", "FREQ=DAILY;BYHOUR=9", "FREQ=DAILY;COUNT=2;UNTIL=20300101"):
+            with self.assertRaises(ValueError):
+                parse_rrule(text)
+
+
+class WeekdayBackfillMigrationTests(TransactionTestCase):
+    def test_backfill_sets_weekday_bits_from_day_names(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate([("schedule", "0001_initial")])
+        apps = executor.loader.project_state([("schedule", "0001_initial")]).apps
+        OldDays = apps.get_model("schedule", "Days")
+        user = User.objects.create_user(username="legacy", password="pass")
+        rows = {
+            "monday": OldDays.objects.create(user_id=user.id, is_repeating=True, available_repeating_days="monday"),
+            "mixed": OldDays.objects.create(user_id=user.id, is_repeating=True, available_repeating_days=" Tuesday, friday ,sunday"),
+            "unknown": OldDays.objects.create(user_id=user.id, is_repeating=True, available_repeating_days="someday"),
+            "specific": OldDays.objects.create(user_id=user.id, is_repeating=False, day=date(2030, 1, 7)),
+        }
+
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes())
+        weekdays = dict(Days.objects.filter(id__in=[row.id for row in rows.values()]).values_list("id", "weekdays"))
+        self.assertEqual(weekdays[rows["monday"].id], 0b1)
+        self.assertEqual(weekdays[rows["mixed"].id], (1 << 1) | (1 << 4) | (1 << 6))
+        self.assertEqual(weekdays[rows["unknown"].id], 0)
+        self.assertEqual(weekdays[rows["specific"].id], 0)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ScheduleViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="host", password="pass")
+        create_weekly_schedule(self.user)
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, url, **params):
+        return self.client.get(url, params).json()
+
+    def test_monthly_open_lists_weekdays(self):
+        data = self.get(f"/api/schedule/monthly/open/{self.user.id}", year=2030, month=1)
+        self.assertEqual(len(data["available_days"]), 23)
+        self.assertIn("2030-01-07", data["available_days"])
+        self.assertNotIn("2030-01-06", data["available_days"])
+
+    def test_daily_open(self):
+        data = self.get(f"/api/schedule/daily/open/{self.user.id}", date="2030-01-07")
+        self.assertTrue(data["available"])
+        self.assertEqual(data["time_slots"], [{"start_time": "09:00:00", "end_time": "17:00:00"}])
+
+    def test_open_views_convert_to_viewer_timezone(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch("/api/schedule/edit", {"timezone": "America/New_York"}, format="json")
+        data = self.get(f"/api/schedule/daily/open/{self.user.id}", date="2030-01-08", tz="Europe/Berlin")
+        self.assertEqual(data["timezone"], "Europe/Berlin")
+        self.assertEqual(data["time_slots"], [{"start_time": "15:00:00", "end_time": "23:00:00"}])
+        data = self.get(f"/api/schedule/monthly/open/{self.user.id}", year=2030, month=1, tz="Asia/Tokyo")
+        # Friday 9-17 in New York spills into Saturday morning in Tokyo.
+        self.assertIn("2030-01-05", data["available_days"])
+        self.assertEqual(self.get(f"/api/schedule/daily/open/{self.user.id}", date="2030-01-08")["timezone"], "America/New_York")
+        self.assertEqual(self.get(f"/api/schedule/daily/open/{self.user.id}", date="2030-01-08", tz="Nowhere/Land")["code"], 400)
+
+    def test_heatmap_counts_free_minutes_per_day(self):
+        url = f"/api/schedule/heatmap/open/{self.user.id}"
+        data = self.get(url, start="2030-01-06", days=7, earliest="true")
+        self.assertEqual(data["free_minutes"], [0, 480, 480, 480, 480, 480, 0])
+        self.assertEqual(data["earliest_free"], [-1, 540, 540, 540, 540, 540, -1])
+
+        # User lookup and the two schedule queries, however long the horizon.
+        with self.assertNumQueries(4):
+            data = self.get(url, start="2030-01-01", days=366)
+        self.assertEqual(len(data["free_minutes"]), 366)
+        self.assertNotIn("earliest_free", data)
+
+    def test_batch_next_available(self):
+        idle = User.objects.create_user(username="idle", password="pass")
+        late = User.objects.create_user(username="late", password="pass")
+        create_weekly_schedule(late, time(13, 0), time(15, 0), ("wednesday",))
+        today = date.today()
+        next_weekday = next(today + timedelta(days=n) for n in range(7) if (today + timedelta(days=n)).weekday() < 5)
+        next_wednesday = today + timedelta(days=(2 - today.weekday()) % 7)
+
+        month_start = (today.replace(day=1) + timedelta(days=32)).replace(day=1)
+        month = [month_start + timedelta(days=n) for n in range(31) if (month_start + timedelta(days=n)).month == month_start.month]
+
+        with self.assertNumQueries(4):
+            data = self.get("/api/schedule/batch/open", users=f"{self.user.id},{idle.id},{late.id}", year=month_start.year, month=month_start.month)
+        hosts = {host["user"]: host for host in data["hosts"]}
+        self.assertEqual(hosts[self.user.id]["next_available"], {
+            "date": str(next_weekday), "slot": {"start_time": "09:00:00", "end_time": "17:00:00"},
+        })
+        self.assertIsNone(hosts[idle.id]["next_available"])
+        self.assertEqual(hosts[late.id]["next_available"]["date"], str(next_wednesday))
+        self.assertEqual(hosts[self.user.id]["available_days"], [str(d) for d in month if d.weekday() < 5])
+        self.assertEqual(hosts[late.id]["available_days"], [str(d) for d in month if d.weekday() == 2])
+        # Months past the range limit would load every day up to them.
+        self.assertEqual(self.get("/api/schedule/batch/open", users=str(self.user.id), year=2400, month=1)["code"], 400)
+
+        data = self.get("/api/schedule/batch/open", users=f"{self.user.id},{late.id}", duration=60, step=60, buffer_before=30)
+        # Starts sit on the hour, and 13:00 leaves no room for the buffer.
+        self.assertEqual(data["hosts"][1]["next_available"]["slot"], {"start_time": "14:00:00", "end_time": "15:00:00"})
+        self.assertEqual(self.get("/api/schedule/batch/open", users=f"{self.user.id},999")["code"], 404)
+
+    def test_open_views_are_cached_until_schedule_changes(self):
+        url = f"/api/schedule/daily/open/{self.user.id}"
+        self.get(url, date="2030-01-07")
+        with self.assertNumQueries(1):
+            data = self.get(url, date="2030-01-07")
+        self.assertTrue(data["available"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/schedule/create", {"unavailable_dates": ["2030-01-07"]}, format="json")
+        data = self.get(url, date="2030-01-07")
+        self.assertFalse(data["available"])
+
+    def test_collective_open_intersects_hosts(self):
+        other = User.objects.create_user(username="other", password="pass")
+        create_weekly_schedule(other, start=time(13, 0), end=time(18, 0))
+        data = self.get("/api/schedule/collective/open", users=f"{self.user.id},{other.id}", start="2030-01-06", end="2030-01-07")
+        self.assertEqual(data["days"][0], {"date": "2030-01-06", "day": "sunday", "available": False, "time_slots": []})
+        self.assertEqual(data["days"][1]["time_slots"], [{"start_time": "13:00:00", "end_time": "17:00:00"}])
+
+        with self.assertNumQueries(5):
+            self.get("/api/schedule/collective/open", users=f"{self.user.id},{other.id}", start="2030-01-01", end="2030-01-30")
+
+    def test_collective_open_converts_host_timezones(self):
+        other = User.objects.create_user(username="other", password="pass")
+        create_weekly_schedule(other)
+        HostProfile.objects.create(user=other, timezone="America/New_York")
+        users = f"{self.user.id},{other.id}"
+        # 09:00-17:00 in New York is 14:00-22:00 UTC in January.
+        data = self.get("/api/schedule/collective/open", users=users, start="2030-01-07")
+        self.assertEqual(data["timezone"], "UTC")
+        self.assertEqual(data["days"][0]["time_slots"], [{"start_time": "14:00:00", "end_time": "17:00:00"}])
+        data = self.get("/api/schedule/collective/open", users=users, start="2030-01-07", tz="America/New_York")
+        self.assertEqual(data["days"][0]["time_slots"], [{"start_time": "09:00:00", "end_time": "12:00:00"}])
+
+    def test_collective_open_unknown_user(self):
+        data = self.get("/api/schedule/collective/open", users=f"{self.user.id},999", start="2030-01-07")
+        self.assertEqual(data["code"], 404)
+        self.assertEqual(data["users"], [999])
+
+    def test_collective_open_caps_users(self):
+        users = ",".join(str(pk) for pk in range(1, MAX_BATCH_USERS + 2))
+        with self.assertNumQueries(0):
+            data = self.get("/api/schedule/collective/open", users=users, start="2030-01-07")
+        self.assertEqual(data["code"], 400)
+
+    def test_open_views_reject_far_dates(self):
+        pk = self.user.id
+        requests = [
+            (f"/api/schedule/heatmap/open/{pk}", {"start": "9999-12-01", "days": 60}),
+            (f"/api/schedule/heatmap/open/{pk}", {"start": "0001-01-01", "tz": "Pacific/Kiritimati"}),
+            (f"/api/schedule/range/open/{pk}", {"start": "9999-12-01", "end": "9999-12-31"}),
+            (f"/api/schedule/range/open/{pk}", {"start": "9999-12-01", "end": "9999-12-31", "stream": "true"}),
+            (f"/api/schedule/daily/open/{pk}", {"date": "9999-12-31", "tz": "Pacific/Kiritimati"}),
+            (f"/api/schedule/monthly/open/{pk}", {"year": 9999, "month": 12}),
+            (f"/api/schedule/monthly/open/{pk}", {"year": 10000, "month": 1}),
+            ("/api/schedule/collective/open", {"users": str(pk), "start": "9999-12-01", "end": "9999-12-31"}),
+        ]
+        for url, params in requests:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200, (url, params))
+            self.assertEqual(response.json()["code"], 400, (url, params))
+
+    def test_range_open(self):
+        data = self.get(f"/api/schedule/range/open/{self.user.id}", start="2030-01-06", end="2030-03-31")
+        self.assertEqual(len(data["days"]), 85)
+        self.assertFalse(data["days"][0]["available"])
+        self.assertEqual(data["days"][1]["time_slots"], [{"start_time": "09:00:00", "end_time": "17:00:00"}])
+
+    def test_range_open_streams_ndjson(self):
+        response = self.client.get(f"/api/schedule/range/open/{self.user.id}", {"start": "2030-01-06", "end": "2031-01-05", "stream": "true"})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        days = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual(len(days), 365)
+        self.assertEqual(days[1]["date"], "2030-01-07")
+        self.assertTrue(days[1]["available"])
+
+    def test_daily_open_bookable_slots(self):
+        data = self.get(f"/api/schedule/daily/open/{self.user.id}", date="2030-01-07", duration=60, step=30, buffer_after=15)
+        starts = [slot["start_time"] for slot in data["bookable_slots"]]
+        self.assertEqual(starts[0], "09:00:00")
+        self.assertEqual(starts[-1], "15:30:00")
+        self.assertEqual(data["bookable_slots"][-1]["end_time"], "16:30:00")
+
+    def test_monthly_open_bookable_slots(self):
+        data = self.get(f"/api/schedule/monthly/open/{self.user.id}", year=2030, month=1, duration=15)
+        self.assertEqual(len(data["available_days"]), 23)
+        self.assertEqual(len(data["bookable_slots"]["2030-01-07"]), 32)
+
+        data = self.get(f"/api/schedule/monthly/open/{self.user.id}", year=2030, month=1, duration=600)
+        self.assertEqual(data["available_days"], [])
+
+    def test_bookable_slots_reject_bad_params(self):
+        data = self.get(f"/api/schedule/daily/open/{self.user.id}", date="2030-01-07", duration=0)
+        self.assertEqual(data["code"], 400)
+
+    def test_open_views_answer_conditional_get(self):
+        url = f"/api/schedule/monthly/open/{self.user.id}"
+        response = self.client.get(url, {"year": 2030, "month": 1})
+        etag = response["ETag"]
+        self.assertIn("max-age=", response["Cache-Control"])
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {"year": 2030, "month": 1}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(url, {"year": 2030, "month": 2}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/schedule/create", {"unavailable_dates": ["2030-01-07"]}, format="json")
+        response = self.client.get(url, {"year": 2030, "month": 1}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+
+class ScheduleWriteTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="host", password="pass")
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self, payload):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post("/api/schedule/create", payload, format="json").json()
+
+    def slots(self, target_date):
+        return load_schedule(self.user, target_date, target_date).available_slots(target_date)
+
+    def test_create_schedule(self):
+        data = self.post({
+            "repeating_days": [{"day": "monday", "start_time": "09:00", "end_time": "17:00"}],
+            "specific_days": [{"date": "2030-01-14", "times": [{"start_time": "10:00", "end_time": "11:00"}]}],
+            "unavailable_dates": ["2030-01-21"],
+            "specific_unavailable": [{"date": "2030-01-28", "times": [{"start_time": "12:00", "end_time": "13:00"}]}],
+        })
+        self.assertEqual(data["code"], 200)
+        self.assertEqual(self.slots(date(2030, 1, 7)), [{"start_time": "09:00:00", "end_time": "17:00:00"}])
+        self.assertEqual(self.slots(date(2030, 1, 8)), [])
+        self.assertEqual(self.slots(date(2030, 1, 14)), [{"start_time": "10:00:00", "end_time": "11:00:00"}])
+        self.assertEqual(self.slots(date(2030, 1, 21)), [])
+        self.assertEqual(self.slots(date(2030, 1, 28)), [
+            {"start_time": "09:00:00", "end_time": "12:00:00"},
+            {"start_time": "13:00:00", "end_time": "17:00:00"},
+        ])
+
+    def test_large_payload_uses_bulk_queries(self):
+        payload = {
+            "repeating_days": [{"day": "monday", "start_time": "09:00", "end_time": "17:00"}],
+            "specific_days": [
+                {"date": str(date(2030, 1, 1) + timedelta(days=i)), "times": [{"start_time": "08:00", "end_time": "12:00"}]}
+                for i in range(90)
+            ],
+        }
+        # Days/Time load, repeating delete cascade, bulk inserts and the
+        # savepoint bookkeeping stay fixed however many dates are sent.
+        with CaptureQueriesContext(connection) as queries:
+            data = self.post(payload)
+        self.assertLess(len(queries), 20)
+        self.assertEqual(data["changes"]["created"], 7 + 2 + 90 + 90 * 2)
+
+    def test_invalid_payload_rolls_back(self):
+        data = self.post({
+            "repeating_days": [{"day": "monday", "start_time": "09:00", "end_time": "17:00"}],
+            "unavailable_dates": ["2030-01-21", "not-a-date"],
+        })
+        self.assertEqual(data["code"], 400)
+        self.assertFalse(Days.objects.filter(user=self.user).exists())
+
+    def test_edit_blocks_time_on_top_of_template(self):
+        self.post({"repeating_days": [{"day": "monday", "start_time": "09:00", "end_time": "17:00"}]})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch("/api/schedule/edit", {
+                "specific_unavailable": [{"date": "2030-01-07", "times": [{"start_time": "09:00", "end_time": "10:00"}]}],
+            }, format="json")
+        self.assertEqual(self.slots(date(2030, 1, 7)), [{"start_time": "10:00:00", "end_time": "17:00:00"}])
+
+    def test_create_recurring_schedule(self):
+        data = self.post({
+            "recurring": [
+                {"rrule": "FREQ=WEEKLY;INTERVAL=2;BYDAY=TU", "start_date": "2030-01-08", "start_time": "09:00", "end_time": "12:00"},
+                {"rrule": "FREQ=MONTHLY;BYDAY=1MO;COUNT=2", "start_date": "2030-01-01", "times": [{"start_time": "13:00", "end_time": "15:00"}]},
+            ],
+            "specific_unavailable": [{"date": "2030-01-22", "times": [{"start_time": "09:00", "end_time": "10:00"}]}],
+        })
+        self.assertEqual(data["code"], 200)
+        self.assertEqual(Days.objects.filter(user=self.user, rrule__isnull=False).count(), 2)
+        self.assertEqual(self.slots(date(2030, 1, 8)), [{"start_time": "09:00:00", "end_time": "12:00:00"}])
+        self.assertEqual(self.slots(date(2030, 1, 15)), [])
+        self.assertEqual(self.slots(date(2030, 1, 22)), [{"start_time": "10:00:00", "end_time": "12:00:00"}])
+        self.assertEqual(self.slots(date(2030, 2, 4)), [{"start_time": "13:00:00", "end_time": "15:00:00"}])
+        self.assertEqual(self.slots(date(2030, 3, 4)), [])
+
+        snapshot = load_schedule(self.user, date(2030, 1, 1), date(2030, 12, 31))
+        self.assertEqual(len(snapshot.available_days(list(date_range(date(2030, 1, 1), date(2030, 12, 31))))), 26 + 2)
+        # The monthly rule ended in February, so later ranges never load it.
+        self.assertEqual(len(load_schedule(self.user, date(2030, 6, 1), date(2030, 6, 30)).rules), 1)
+
+        self.assertEqual(self.post({"recurring": [{"rrule": "FREQ=YEARLY", "start_date": "2030-01-01"}]})["code"], 400)
+        self.assertEqual(Days.objects.filter(user=self.user, rrule__isnull=False).count(), 2)
+
+    def test_edit_only_writes_changed_intervals(self):
+        self.post({"specific_days": [{"date": "2030-01-07", "times": [{"start_time": "09:00", "end_time": "17:00"}]}]})
+        def block(start, end):
+            with self.captureOnCommitCallbacks(execute=True):
+                return self.client.patch("/api/schedule/edit", {
+                    "specific_unavailable": [{"date": "2030-01-07", "times": [{"start_time": start, "end_time": end}]}],
+                }, format="json").json()["changes"]
+
+        self.assertEqual(block("12:00", "12:30"), {"created": 1, "updated": 0, "deleted": 0})
+        self.assertEqual(block("12:30", "13:00"), {"created": 0, "updated": 1, "deleted": 0})
+        self.assertEqual(block("09:00", "12:00"), {"created": 0, "updated": 1, "deleted": 1})
+        self.assertEqual(Time.objects.filter(day__day=date(2030, 1, 7)).count(), 2)
+        self.assertEqual(self.slots(date(2030, 1, 7)), [{"start_time": "13:00:00", "end_time": "17:00:00"}])
+
+
+class ScheduleImportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="host", password="pass")
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def slots(self, target_date):
+        return load_schedule(self.user, target_date, target_date).available_slots(target_date)
+
+    def test_csv_upload_reports_bad_rows_and_applies_the_rest(self):
+        upload = SimpleUploadedFile("schedule.csv", "\n".join([
+            "date,start_time,end_time,status",
+            "monday,09:00,17:00,available",
+            "2030-01-08,10:00,12:00,available",
+            "2030-01-08,14:00,15:00,available",
+            "2030-01-14,12:00,13:00,unavailable",
+            "2030-01-15,,,unavailable",
+            "2030-13-01,10:00,11:00,available",
+            "2030-01-16,11:00,10:00,available",
+        ]).encode())
+        with self.captureOnCommitCallbacks(execute=True):
+            data = self.client.post("/api/schedule/import", {"file": upload}).json()
+
+        self.assertEqual(data["code"], 200)
+        self.assertFalse(data["success"])
+        self.assertEqual(data["report"]["applied"], 5)
+        self.assertEqual([e["line"] for e in data["report"]["errors"]], [7, 8])
+        self.assertEqual(self.slots(date(2030, 1, 7)), [{"start_time": "09:00:00", "end_time": "17:00:00"}])
+        self.assertEqual(self.slots(date(2030, 1, 8)), [
+            {"start_time": "10:00:00", "end_time": "12:00:00"},
+            {"start_time": "14:00:00", "end_time": "15:00:00"},
+        ])
+        self.assertEqual(self.slots(date(2030, 1, 14)), [
+            {"start_time": "09:00:00", "end_time": "12:00:00"},
+            {"start_time": "13:00:00", "end_time": "17:00:00"},
+        ])
+        self.assertEqual(self.slots(date(2030, 1, 15)), [])
+
+    def test_ics_import_in_chunks(self):
+        create_weekly_schedule(self.user, time(0, 0), time(23, 59), WEEKDAY_MAP)
+        ics = "\r\n".join([
+            "BEGIN:VCALENDAR",
+            "BEGIN:VEVENT",
+            "SUMMARY:Holiday",
+            "DTSTART;VALUE=DATE:20300107",
+            "DTEND;VALUE=DATE:20300110",
+            "END:VEVENT",
+            "BEGIN:VEVENT",
+            "DTSTART:20300111T220000",
+            "DTEND:20300112T020000",
+            "END:VEVENT",
+            "BEGIN:VEVENT",
+            "DTSTART:20300114T090000",
+            "RRULE:FREQ=WEEKLY",
+            "END:VEVENT",
+            "END:VCALENDAR",
+        ]).splitlines(keepends=True)
+        report = import_schedule(self.user.id, parse_ics(ics), chunk_days=2)
+
+        self.assertEqual(report.applied, 5)
+        self.assertEqual(report.chunks, 3)
+        self.assertEqual(report.errors, [{"line": 11, "error": "recurring events (RRULE) are not supported"}])
+        for day in (7, 8, 9):
+            self.assertEqual(self.slots(date(2030, 1, day)), [])
+        self.assertEqual(self.slots(date(2030, 1, 10)), [{"start_time": "00:00:00", "end_time": "23:59:00"}])
+        self.assertEqual(self.slots(date(2030, 1, 11)), [{"start_time": "00:00:00", "end_time": "22:00:00"}])
+        self.assertEqual(self.slots(date(2030, 1, 12)), [{"start_time": "02:00:00", "end_time": "23:59:00"}])
+
+    def test_ics_upload_converts_utc_and_tzid_times(self):
+        create_weekly_schedule(self.user, time(0, 0), time(23, 59), WEEKDAY_MAP)
+        HostProfile.objects.create(user=self.user, timezone="America/New_York")
+        upload = SimpleUploadedFile("schedule.ics", "\r\n".join([
+            "BEGIN:VCALENDAR",
+            "BEGIN:VEVENT",
+            "DTSTART:20300111T030000Z",
+            "DTEND:20300111T070000Z",
+            "END:VEVENT",
+            "BEGIN:VEVENT",
+            "DTSTART;TZID=Europe/Berlin:20300114T150000",
+            "DTEND;TZID=Europe/Berlin:20300114T160000",
+            "END:VEVENT",
+            "BEGIN:VEVENT",
+            "DTSTART;TZID=Nowhere/Land:20300115T150000",
+            "DTEND;TZID=Nowhere/Land:20300115T160000",
+            "END:VEVENT",
+            "END:VCALENDAR",
+        ]).encode())
+        with self.captureOnCommitCallbacks(execute=True):
+            data = self.client.post("/api/schedule/import", {"file": upload}).json()
+        self.assertEqual(data["report"]["errors"], [{"line": 10, "error": "Unknown timezone 'Nowhere/Land'"}])
+        # 03:00-07:00 UTC is 22:00-02:00 in New York, so it splits across midnight.
+        self.assertEqual(self.slots(date(2030, 1, 10)), [{"start_time": "00:00:00", "end_time": "22:00:00"}])
+        self.assertEqual(self.slots(date(2030, 1, 11)), [{"start_time": "02:00:00", "end_time": "23:59:00"}])
+        self.assertEqual(self.slots(date(2030, 1, 14)), [
+            {"start_time": "00:00:00", "end_time": "09:00:00"},
+            {"start_time": "10:00:00", "end_time": "23:59:00"},
+        ])
@@ -0,0 +1,128 @@
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from .intervals import DAY_MINUTES, unpack_days
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+EPOCH_DATE = EPOCH.date()
+
+
+@lru_cache(maxsize=None)
+def get_zone(name):
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown timezone {name!r}")
+
+
+def _offset(zone, minute):
+    """UTC offset of ``zone``, in whole minutes, at ``minute`` minutes after the epoch."""
+    return int((EPOCH + timedelta(minutes=minute)).astimezone(zone).utcoffset().total_seconds()) // 60
+
+
+@lru_cache(maxsize=1024)
+def year_transitions(name, year):
+    """
+    The offsets ``name`` uses during UTC year ``year`` as ``(starts, offsets,
+    end)``: ``offsets[i]`` is in force from epoch minute ``starts[i]`` until
+    the next start or ``end``.
+
+    The year is probed a day at a time and each change is bisected down to the
+    minute, so building a year costs a few hundred ``utcoffset`` calls once
+    and every later conversion reuses it.
+    """
+    zone = get_zone(name)
+    start = int((datetime(year, 1, 1, tzinfo=dt_timezone.utc) - EPOCH).total_seconds()) // 60
+    end = int((datetime(year + 1, 1, 1, tzinfo=dt_timezone.utc) - EPOCH).total_seconds()) // 60
+    current = _offset(zone, start)
+    starts, offsets = [start], [current]
+    minute = start
+    while minute < end:
+        probe = min(minute + DAY_MINUTES, end) - 1
+        if _offset(zone, probe) == current:
+            minute = probe + 1
+            continue
+        low, high = minute, probe
+        while high - low > 1:
+            middle = (low + high) // 2
+            if _offset(zone, middle) == current:
+                low = middle
+            else:
+                high = middle
+        current = _offset(zone, high)
+        starts.append(high)
+        offsets.append(current)
+        minute = high
+    return tuple(starts), tuple(offsets), end
+
+
+def offset_segments(name, start, end):
+    """Yield ``(segment_start, segment_end, offset)`` covering epoch minutes ``start``..``end``."""
+    year = (EPOCH + timedelta(minutes=start)).year
+    while start < end:
+        starts, offsets, year_end = year_transitions(name, year)
+        index = bisect_right(starts, start) - 1
+        while start < min(end, year_end):
+            segment_end = min(starts[index + 1] if index + 1 < len(starts) else year_end, end)
+            yield start, segment_end, offsets[index]
+            start = segment_end
+            index += 1
+        year += 1
+
+
+def wall_minute(target_date):
+    """Minutes from 1970-01-01 00:00 to midnight of ``target_date`` on a wall clock."""
+    return (target_date - EPOCH_DATE).days * DAY_MINUTES
+
+
+def convert_window(day, start_time, end_time, from_tz, to_tz):
+    """
+    Move the ``start_time``-``end_time`` window on ``day`` from ``from_tz``'s
+    wall clock to ``to_tz``'s, returning ``(day, start_time, end_time)``.
+    Raises ValueError if the window does not fall on a single day in ``to_tz``.
+    """
+    start = datetime.combine(day, start_time, tzinfo=get_zone(from_tz)).astimezone(get_zone(to_tz))
+    end = datetime.combine(day, end_time, tzinfo=get_zone(from_tz)).astimezone(get_zone(to_tz))
+    if start.date() != end.date():
+        raise ValueError(f"The meeting must start and end on the same day in {to_tz}")
+    return start.date(), start.time().replace(tzinfo=None), end.time().replace(tzinfo=None)
+
+
+def convert_days(bits, from_date, from_tz, to_date, num_days, to_tz):
+    """
+    Re-slice packed availability into another timezone.
+
+    ``bits`` holds consecutive wall-clock days of ``from_tz`` starting at
+    ``from_date`` (day ``i`` at bit ``i * 1440``); the result is ``num_days``
+    DayMasks for the wall-clock days of ``to_tz`` starting at ``to_date``.
+    Each stretch of constant UTC offset moves with a single shift, so a month
+    costs a handful of big-integer operations whatever the slots look like.
+    Minutes skipped by a DST jump are never available and minutes repeated
+    when clocks go back take the availability of both passes.
+
+    ``bits`` must cover ``to_date`` minus two days to the last day plus two,
+    which is enough for any pair of real UTC offsets.
+    """
+    source_start = wall_minute(from_date)
+    source_bits = bits.bit_length()
+    target_start = wall_minute(to_date)
+    target_end = target_start + num_days * DAY_MINUTES
+    # No UTC offset is a day or more, so these UTC minutes cover every target minute.
+    utc_start, utc_end = target_start - DAY_MINUTES, target_end + DAY_MINUTES
+
+    utc_bits = 0
+    for segment_start, segment_end, offset in offset_segments(from_tz, utc_start, utc_end):
+        low = max(segment_start + offset - source_start, 0)
+        high = min(segment_end + offset - source_start, source_bits)
+        if low < high:
+            chunk = (bits >> low) & ((1 << (high - low)) - 1)
+            utc_bits |= chunk << (low + source_start - offset - utc_start)
+
+    target_bits = 0
+    for segment_start, segment_end, offset in offset_segments(to_tz, utc_start, utc_end):
+        chunk = (utc_bits >> (segment_start - utc_start)) & ((1 << (segment_end - segment_start)) - 1)
+        position = segment_start + offset - target_start
+        target_bits |= chunk << position if position >= 0 else chunk >> -position
+
+    return unpack_days(target_bits & ((1 << (num_days * DAY_MINUTES)) - 1), num_days)
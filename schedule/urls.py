@@ -6,7 +6,12 @@ urlpatterns = [
     path('monthly', getMonthlySchedule, name="monthly"),
     path('daily/open/<int:pk>', getDailyScheduleOpen, name="daily-open"),
     path('monthly/open/<int:pk>', getMonthlyScheduleOpen, name="monthly-open"),
+    path('range/open/<int:pk>', getRangeScheduleOpen, name="range-open"),
+    path('heatmap/open/<int:pk>', getHeatmapScheduleOpen, name="heatmap-open"),
+    path('collective/open', getCollectiveScheduleOpen, name="collective-open"),
+    path('batch/open', getBatchScheduleOpen, name="batch-open"),
     path('create', createSchedule, name="create"),
     path('edit', editSchedule, name="edit"),
+    path('import', importSchedule, name="import"),
     path('delete', deleteSchedule, name="delete"),
 ]
\ No newline at end of file
@@ -1,79 +1,67 @@
 import calendar
-from datetime import time, datetime as dt
+import io
+import json
+from datetime import datetime as dt, timedelta
+from itertools import islice
+from django.http import StreamingHttpResponse
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from .models import Days, Time
+from django.db import transaction
+from .models import Days, HostProfile, WEEKDAY_MAP
+from .availability import (
+    batch_availability, bookable_slots, collective_availability, host_timezone, iter_availability, next_available,
+)
+from .cache import available_days, bookable_days, bump_schedule_version, daily_slots, heatmap, schedule_timezone
+from .conditional import availability_etag, is_not_modified, not_modified, with_validators
+from .intervals import DayMask, time_from_str
+from .storage import ScheduleWriter
+from .importers import PARSERS, import_schedule
+from .timezones import get_zone
 from django.contrib.auth.models import User
-
-WEEKDAY_MAP = {
-    "monday": 0,
-    "tuesday": 1,
-    "wednesday": 2,
-    "thursday": 3,
-    "friday": 4,
-    "saturday": 5,
-    "sunday": 6,
-}
-
-def time_from_str(t_str):
-    t_str = t_str.strip()
-    if t_str.startswith("24:"):
-        return time(23, 59)
-    try:
-        hour, minute = map(int, t_str.split(":"))
-        if hour > 23 or minute > 59:
-            raise ValueError("Hour must be 0-23 and minute 0-59")
-        return time(hour, minute)
-    except ValueError:
-        dt_obj = dt.strptime(t_str, "%I:%M %p")
-        return time(dt_obj.hour, dt_obj.minute)
-
-def calculate_unavailable_intervals(available_intervals):
-    unavailable = []
-    current = time(0, 0)
-    sorted_avail = sorted(available_intervals, key=lambda x: x["start"])
-    for interval in sorted_avail:
-        if interval["start"] > current:
-            unavailable.append({"start": current, "end": interval["start"]})
-        current = max(current, interval["end"])
-    if current < time(23, 59):
-        unavailable.append({"start": current, "end": time(23, 59)})
-    return unavailable
-
-def merge_intervals(intervals):
-    if not intervals:
-        return []
-    sorted_intervals = sorted(intervals, key=lambda x: x["start"])
-    merged = [sorted_intervals[0]]
-    for current in sorted_intervals[1:]:
-        last = merged[-1]
-        if current["start"] <= last["end"]:
-            last["end"] = max(last["end"], current["end"])
-        else:
-            merged.append(current)
-    return merged
-
-def get_available_slots(unavailable_times):
-    unavailable_intervals = [{"start": t.start_time, "end": t.end_time} for t in unavailable_times]
-    unavailable_intervals = merge_intervals(unavailable_intervals)
-    slots = []
-    current = time(0, 0)
-    for interval in unavailable_intervals:
-        if interval["start"] > current:
-            slots.append({"start_time": str(current), "end_time": str(interval["start"])})
-        current = interval["end"]
-    if current < time(23, 59):
-        slots.append({"start_time": str(current), "end_time": "23:59"})
-    return slots
-
-def apply_specific_unavailable(day_obj, specific_unavailable_times):
-    current_unavailable = [{"start": t.start_time, "end": t.end_time} for t in day_obj.times.all()]
-    new_unavailable = [{"start": time_from_str(t["start_time"]), "end": time_from_str(t["end_time"])} for t in specific_unavailable_times]
-    merged = merge_intervals(current_unavailable + new_unavailable)
-    day_obj.times.all().delete()
-    for interval in merged:
-        Time.objects.create(day=day_obj, start_time=interval["start"], end_time=interval["end"])
+from calendly.routers import replica_reads
+
+MAX_RANGE_DAYS = 366
+MAX_BATCH_USERS = 500
+MAX_STREAM_DAYS = 3660
+# How far from today the open views will look, in the past and the future.
+MAX_PAST_DAYS = MAX_RANGE_DAYS
+MAX_FUTURE_DAYS = 3660
+
+def booking_params(request):
+    """
+    Read the optional ``duration``/``step``/``buffer_before``/``buffer_after``
+    query params. Returns None when no duration was asked for.
+    """
+    if not request.query_params.get("duration"):
+        return None
+    duration = int(request.query_params["duration"])
+    step = int(request.query_params.get("step", duration))
+    buffer_before = int(request.query_params.get("buffer_before", 0))
+    buffer_after = int(request.query_params.get("buffer_after", 0))
+    if not 0 < duration <= 24 * 60 or not 0 < step <= 24 * 60:
+        raise ValueError("duration and step must be between 1 and 1440 minutes")
+    if buffer_before < 0 or buffer_after < 0 or duration + buffer_before + buffer_after > 24 * 60:
+        raise ValueError("buffers must be positive and fit in a day with the duration")
+    return {"duration": duration, "step": step, "buffer_before": buffer_before, "buffer_after": buffer_after}
+
+def viewer_timezone(request):
+    """The optional ``tz`` query param, checked against the zoneinfo database."""
+    tz = request.query_params.get("tz")
+    if tz:
+        get_zone(tz)
+    return tz or None
+
+def check_start(start_date, today):
+    """Keep requests near today; dates at the edge of the calendar overflow once the timezone margin is added."""
+    if not -MAX_PAST_DAYS <= (start_date - today).days <= MAX_FUTURE_DAYS:
+        raise ValueError(f"start must be between {MAX_PAST_DAYS} days before and {MAX_FUTURE_DAYS} days after today")
+
+def month_dates(year, month):
+    first_weekday, num_days = calendar.monthrange(year, month)
+    today = dt.today().date()
+    all_dates = [dt(year, month, day).date() for day in range(1, num_days + 1)]
+    return [date for date in all_dates if date >= today]
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
@@ -97,32 +85,12 @@ def getDailySchedule(request):
             "time_slots": []
         })
 
-    unavailable_times = []
-    weekday_name = target_date.strftime("%A").lower()
-
-    repeating_entries = Days.objects.filter(user=user, is_repeating=True)
-    found_day = False
-
-    for entry in repeating_entries:
-        entry_days = []
-        if entry.available_repeating_days:
-            entry_days = [d.strip().lower() for d in entry.available_repeating_days.split(",")]
-        if weekday_name in entry_days:
-            found_day = True
-            unavailable_times.extend(entry.times.all())
-    if not found_day:
-        unavailable_times.append(Time(start_time=time(0,0), end_time=time(23,59)))
-
-    specific_entry = Days.objects.filter(user=user, is_repeating=False, day=target_date).first()
-    if specific_entry:
-        unavailable_times = list(specific_entry.times.all())
-
-    available_slots = get_available_slots(unavailable_times)
+    available_slots = daily_slots(user, target_date)
 
     return Response({
         "code": 200,
         "date": str(target_date),
-        "day": weekday_name,
+        "day": target_date.strftime("%A").lower(),
         "available": len(available_slots) > 0,
         "time_slots": available_slots
     })
@@ -134,39 +102,7 @@ def getMonthlySchedule(request):
     year = int(request.query_params.get("year", dt.today().year))
     month = int(request.query_params.get("month", dt.today().month))
 
-    first_weekday, num_days = calendar.monthrange(year, month)
-    all_dates = [dt(year, month, day).date() for day in range(1, num_days + 1)]
-
-    today = dt.today().date()
-    all_dates = [date for date in all_dates if date >= today]
-
-    available_dates = []
-
-    repeating_entries = Days.objects.filter(user=user, is_repeating=True)
-
-    for date in all_dates:
-
-        unavailable_times = []
-        weekday_name = date.strftime("%A").lower()
-        found_day = False
-
-        for entry in repeating_entries:
-            if entry.available_repeating_days:
-                entry_days = [d.strip().lower() for d in entry.available_repeating_days.split(",")]
-                if weekday_name in entry_days:
-                    found_day = True
-                    unavailable_times.extend(entry.times.all())
-
-        if not found_day:
-            unavailable_times.append(Time(start_time=time(0,0), end_time=time(23,59)))
-
-        specific_entry = Days.objects.filter(user=user, is_repeating=False, day=date).first()
-        if specific_entry:
-            unavailable_times = list(specific_entry.times.all())
-
-        available_slots = get_available_slots(unavailable_times)
-        if available_slots:
-            available_dates.append(str(date))
+    available_dates = available_days(user, month_dates(year, month))
 
     return Response({
         "code": 200,
@@ -178,6 +114,7 @@ def getMonthlySchedule(request):
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@replica_reads(lambda request, pk: pk)
 def getDailyScheduleOpen(request, pk):
     try:
         user = User.objects.get(pk=pk)
@@ -202,6 +139,12 @@ def getDailyScheduleOpen(request, pk):
             "error": "Invalid date format in params"
         })
 
+    try:
+        booking = booking_params(request)
+        tz = viewer_timezone(request)
+    except ValueError as e:
+        return Response({"code": 400, "error": str(e)})
+
     today = dt.today().date()
     if target_date < today:
         return Response({
@@ -209,191 +152,364 @@ def getDailyScheduleOpen(request, pk):
             "available": False,
             "time_slots": []
         })
+    try:
+        check_start(target_date, today)
+    except ValueError as e:
+        return Response({"code": 400, "error": str(e)})
 
-    unavailable_times = []
-    weekday_name = target_date.strftime("%A").lower()
-
-    repeating_entries = Days.objects.filter(user=user, is_repeating=True)
-    found_day = False
-    for entry in repeating_entries:
-        if entry.available_repeating_days:
-            entry_days = [d.strip().lower() for d in entry.available_repeating_days.split(",")]
-            if weekday_name in entry_days:
-                found_day = True
-                unavailable_times.extend(entry.times.all())
-
-    if not found_day:
-        unavailable_times.append(Time(start_time=time(0, 0), end_time=time(23, 59)))
-
-    specific_entry = Days.objects.filter(user=user, is_repeating=False, day=target_date).first()
-    if specific_entry:
-        unavailable_times = list(specific_entry.times.all())
-
-    available_slots = get_available_slots(unavailable_times)
+    etag = availability_etag(request, user.id, today)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
 
-    return Response({
+    available_slots = daily_slots(user, target_date, tz)
+    response = {
         "code": 200,
         "date": str(target_date),
-        "day": weekday_name,
+        "day": target_date.strftime("%A").lower(),
+        "timezone": tz or schedule_timezone(user),
         "available": len(available_slots) > 0,
         "time_slots": available_slots
-    })
+    }
+    if booking:
+        response["bookable_slots"] = bookable_days(user, [target_date], booking, tz)[str(target_date)]
+        response["available"] = len(response["bookable_slots"]) > 0
+
+    return with_validators(Response(response), etag)
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@replica_reads(lambda request, pk: pk)
 def getMonthlyScheduleOpen(request, pk):
     try:
         user = User.objects.get(pk=pk)
     except User.DoesNotExist:
         return Response({"code": 404, "error": "User not found"})
 
-    year = int(request.query_params.get("year", dt.today().year))
-    month = int(request.query_params.get("month", dt.today().month))
-
-    first_weekday, num_days = calendar.monthrange(year, month)
-    all_dates = [dt(year, month, day).date() for day in range(1, num_days + 1)]
-
-    today = dt.today().date()
-    all_dates = [date for date in all_dates if date >= today]
+    try:
+        year = int(request.query_params.get("year", dt.today().year))
+        month = int(request.query_params.get("month", dt.today().month))
+        check_start(dt(year, month, 1).date(), dt.today().date())
+        booking = booking_params(request)
+        tz = viewer_timezone(request)
+    except ValueError as e:
+        return Response({"code": 400, "error": str(e)})
+
+    etag = availability_etag(request, user.id, dt.today().date())
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
+    response = {
+        "code": 200,
+        "success": True,
+        "year": year,
+        "month": month,
+        "timezone": tz or schedule_timezone(user),
+    }
+    if booking:
+        bookable = bookable_days(user, month_dates(year, month), booking, tz)
+        response["available_days"] = [date for date, slots in bookable.items() if slots]
+        response["bookable_slots"] = {date: slots for date, slots in bookable.items() if slots}
+    else:
+        response["available_days"] = available_days(user, month_dates(year, month), tz)
 
-    available_dates = []
-    repeating_entries = Days.objects.filter(user=user, is_repeating=True)
+    return with_validators(Response(response), etag)
 
-    for date in all_dates:
-        unavailable_times = []
-        weekday_name = date.strftime("%A").lower()
-        found_day = False
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+@replica_reads(lambda request, pk: pk)
+def getHeatmapScheduleOpen(request, pk):
+    try:
+        user = User.objects.get(pk=pk)
+    except User.DoesNotExist:
+        return Response({"code": 404, "error": "User not found"})
 
-        for entry in repeating_entries:
-            if entry.available_repeating_days:
-                entry_days = [d.strip().lower() for d in entry.available_repeating_days.split(",")]
-                if weekday_name in entry_days:
-                    found_day = True
-                    unavailable_times.extend(entry.times.all())
+    today = dt.today().date()
+    try:
+        start_str = request.query_params.get("start")
+        start_date = dt.strptime(start_str, "%Y-%m-%d").date() if start_str else today
+        check_start(start_date, today)
+        num_days = int(request.query_params.get("days", 365))
+        tz = viewer_timezone(request)
+    except ValueError as e:
+        return Response({"code": 400, "error": str(e)})
+    if not 0 < num_days <= MAX_RANGE_DAYS:
+        return Response({"code": 400, "error": f"days must be between 1 and {MAX_RANGE_DAYS}"})
+
+    etag = availability_etag(request, user.id, today)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
+    free, earliest = heatmap(user, start_date, num_days, tz)
+    past = max(0, min((today - start_date).days, num_days))
+    response = {
+        "code": 200,
+        "success": True,
+        "start": str(start_date),
+        "days": num_days,
+        "timezone": tz or schedule_timezone(user),
+        "free_minutes": [0] * past + free[past:],
+    }
+    if request.query_params.get("earliest", "").lower() in ("1", "true"):
+        response["earliest_free"] = [-1] * past + earliest[past:]
+
+    return with_validators(Response(response), etag)
+
+def availability_days(days, booking=None):
+    """Format ``(date, DayMask)`` pairs, working through them a month at a time."""
+    today = dt.today().date()
+    days = iter(days)
+    while True:
+        chunk = list(islice(days, 31))
+        if not chunk:
+            return
+        if booking:
+            bookable = bookable_slots([mask for date, mask in chunk], **booking)
+        for index, (date, mask) in enumerate(chunk):
+            time_slots = mask.slots() if date >= today else []
+            day = {
+                "date": str(date),
+                "day": date.strftime("%A").lower(),
+                "available": len(time_slots) > 0,
+                "time_slots": time_slots
+            }
+            if booking:
+                day["bookable_slots"] = bookable[index] if date >= today else []
+                day["available"] = len(day["bookable_slots"]) > 0
+            yield day
 
-        if not found_day:
-            unavailable_times.append(Time(start_time=time(0, 0), end_time=time(23, 59)))
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def getRangeScheduleOpen(request, pk):
+    try:
+        user = User.objects.get(pk=pk)
+    except User.DoesNotExist:
+        return Response({"code": 404, "error": "User not found"})
 
-        specific_entry = Days.objects.filter(user=user, is_repeating=False, day=date).first()
-        if specific_entry:
-            unavailable_times = list(specific_entry.times.all())
+    start_str = request.query_params.get("start")
+    end_str = request.query_params.get("end")
+    if not start_str or not end_str:
+        return Response({"code": 400, "error": "Please provide a start and end date"})
+    try:
+        start_date = dt.strptime(start_str, "%Y-%m-%d").date()
+        end_date = dt.strptime(end_str, "%Y-%m-%d").date()
+    except ValueError:
+        return Response({"code": 400, "error": "Invalid date format in params"})
 
-        available_slots = get_available_slots(unavailable_times)
-        if available_slots:
-            available_dates.append(str(date))
+    try:
+        check_start(start_date, dt.today().date())
+        booking = booking_params(request)
+        tz = viewer_timezone(request)
+    except ValueError as e:
+        return Response({"code": 400, "error": str(e)})
+
+    stream = request.query_params.get("stream", "").lower() in ("1", "true")
+    max_days = MAX_STREAM_DAYS if stream else MAX_RANGE_DAYS
+    if end_date < start_date or (end_date - start_date).days >= max_days:
+        return Response({"code": 400, "error": f"Date range must be between 1 and {max_days} days"})
+
+    if stream:
+        days = availability_days(iter_availability(user, start_date, end_date, tz=tz), booking)
+        lines = (json.dumps(day) + "\n" for day in days)
+        return StreamingHttpResponse(lines, content_type="application/x-ndjson")
 
     return Response({
         "code": 200,
         "success": True,
-        "year": year,
-        "month": month,
-        "available_days": available_dates
+        "start": str(start_date),
+        "end": str(end_date),
+        "timezone": tz or schedule_timezone(user),
+        "days": list(availability_days(iter_availability(user, start_date, end_date, tz=tz), booking))
     })
 
-@api_view(["POST"])
+@api_view(["GET"])
 @permission_classes([IsAuthenticated])
-def createSchedule(request):
-    user = request.user
-    data = request.data
-    
-    available_repeating = data.get("repeating_days", [])
-    available_specific = data.get("specific_days", [])
-    unavailable_dates = data.get("unavailable_dates", [])
-    specific_unavailable = data.get("specific_unavailable", [])
-
-    all_weekdays = list(WEEKDAY_MAP.keys())
-
-    if available_repeating:
-        Days.objects.filter(user=user, is_repeating=True).delete()
-
-        for day_name in all_weekdays:
-            found = next((d for d in available_repeating if d["day"].lower() == day_name), None)
-            day_obj = Days.objects.create(user=user, is_repeating=True, day=None, available_repeating_days=day_name if found else "")
+def getCollectiveScheduleOpen(request):
+    try:
+        user_ids = sorted({int(pk) for pk in request.query_params.get("users", "").split(",") if pk.strip()})
+    except ValueError:
+        return Response({"code": 400, "error": "users must be a comma separated list of ids"})
+    if not user_ids or len(user_ids) > MAX_BATCH_USERS:
+        return Response({"code": 400, "error": f"Please provide between 1 and {MAX_BATCH_USERS} users"})
 
-            if found:
-                start_time = time_from_str(found["start_time"])
-                end_time = time_from_str(found["end_time"])
-                intervals = calculate_unavailable_intervals([{"start": start_time, "end": end_time}])
-                for interval in intervals:
-                    Time.objects.create(day=day_obj, start_time=interval["start"], end_time=interval["end"])
+    start_str = request.query_params.get("start")
+    if not start_str:
+        return Response({"code": 400, "error": "Please provide a start date"})
+    try:
+        start_date = dt.strptime(start_str, "%Y-%m-%d").date()
+        end_date = dt.strptime(request.query_params.get("end", start_str), "%Y-%m-%d").date()
+    except ValueError:
+        return Response({"code": 400, "error": "Invalid date format in params"})
+    if end_date < start_date or (end_date - start_date).days >= MAX_RANGE_DAYS:
+        return Response({"code": 400, "error": f"Date range must be between 1 and {MAX_RANGE_DAYS} days"})
 
-    for specific_day in available_specific:
-        date_str = specific_day.get("date")
-        if not date_str:
-            continue
-        target_date = dt.strptime(date_str, "%Y-%m-%d").date()
-        weekday_name = target_date.strftime("%A").lower()
+    found = set(User.objects.filter(id__in=user_ids).values_list("id", flat=True))
+    missing = [pk for pk in user_ids if pk not in found]
+    if missing:
+        return Response({"code": 404, "error": "User not found", "users": missing})
 
-        repeating_day = Days.objects.filter(user=user, is_repeating=True, available_repeating_days__icontains=weekday_name).first()
+    try:
+        check_start(start_date, dt.today().date())
+        booking = booking_params(request)
+        tz = viewer_timezone(request) or "UTC"
+    except ValueError as e:
+        return Response({"code": 400, "error": str(e)})
 
-        if repeating_day:
-            day_obj, created = Days.objects.get_or_create(user=user, day=target_date, is_repeating=False)
-            if created or not day_obj.times.exists():
-                for t in repeating_day.times.all():
-                    Time.objects.create(day=day_obj, start_time=t.start_time, end_time=t.end_time)
-        else:
-            day_obj, created = Days.objects.get_or_create(user=user, day=target_date, is_repeating=False)
+    days = list(availability_days(collective_availability(user_ids, start_date, end_date, tz), booking))
 
-        day_obj.times.all().delete()
+    return Response({
+        "code": 200,
+        "success": True,
+        "users": user_ids,
+        "start": str(start_date),
+        "end": str(end_date),
+        "timezone": tz,
+        "days": days
+    })
 
-        if specific_day.get("unavailable", False):
-            Time.objects.create(day=day_obj, start_time=time(0,0), end_time=time(23,59))
-            continue
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def getBatchScheduleOpen(request):
+    try:
+        user_ids = list(dict.fromkeys(int(pk) for pk in request.query_params.get("users", "").split(",") if pk.strip()))
+    except ValueError:
+        return Response({"code": 400, "error": "users must be a comma separated list of ids"})
+    if not user_ids or len(user_ids) > MAX_BATCH_USERS:
+        return Response({"code": 400, "error": f"Please provide between 1 and {MAX_BATCH_USERS} users"})
 
-        available_times = []
-        for t in specific_day.get("times", []):
-            start = time_from_str(t["start_time"])
-            end = time_from_str(t["end_time"])
-            available_times.append({"start": start, "end": end})
+    today = dt.today().date()
+    try:
+        horizon = int(request.query_params.get("days", 60))
+        year, month = request.query_params.get("year"), request.query_params.get("month")
+        dates = month_dates(int(year), int(month)) if year and month else []
+        booking = booking_params(request)
+        tz = viewer_timezone(request)
+    except ValueError as e:
+        return Response({"code": 400, "error": str(e)})
+    if not 0 < horizon <= MAX_RANGE_DAYS:
+        return Response({"code": 400, "error": f"days must be between 1 and {MAX_RANGE_DAYS}"})
+    # The month shares one load with the horizon, so it has to start within the range limit.
+    if dates and dates[0] > today + timedelta(days=MAX_RANGE_DAYS):
+        return Response({"code": 400, "error": f"month must start within {MAX_RANGE_DAYS} days"})
+
+    found = set(User.objects.filter(id__in=user_ids).values_list("id", flat=True))
+    missing = [pk for pk in user_ids if pk not in found]
+    if missing:
+        return Response({"code": 404, "error": "User not found", "users": missing})
+
+    # One load covers both the next-available horizon and the requested month.
+    horizon_end = today + timedelta(days=horizon - 1)
+    end_date = max(horizon_end, dates[-1]) if dates else horizon_end
+    masks = batch_availability(user_ids, today, end_date, tz)
+
+    hosts = []
+    for user_id in user_ids:
+        host = {"user": user_id, "next_available": None}
+        found_slot = next_available(masks[user_id][:horizon], today, booking)
+        if found_slot:
+            host["next_available"] = {"date": str(found_slot[0]), "slot": found_slot[1]}
+        if year and month:
+            month_masks = [masks[user_id][(d - today).days] for d in dates]
+            if booking:
+                bookable = bookable_slots(month_masks, **booking)
+                host["available_days"] = [str(d) for d, slots in zip(dates, bookable) if slots]
+            else:
+                host["available_days"] = [str(d) for d, mask in zip(dates, month_masks) if mask]
+        hosts.append(host)
 
-        intervals = calculate_unavailable_intervals(available_times)
-        for interval in intervals:
-            Time.objects.create(day=day_obj, start_time=interval["start"], end_time=interval["end"])
+    return Response({
+        "code": 200,
+        "success": True,
+        "start": str(today),
+        "days": horizon,
+        "hosts": hosts
+    })
 
-    for date_str in unavailable_dates:
+def schedule_dates(data):
+    dates = [entry.get("date") for entry in data.get("specific_days", [])]
+    dates += data.get("unavailable_dates", [])
+    dates += [entry.get("date") for entry in data.get("specific_unavailable", [])]
+    return [dt.strptime(date_str, "%Y-%m-%d").date() for date_str in dates if date_str]
+
+def available_mask_from(entries):
+    return DayMask.from_times((time_from_str(t["start_time"]), time_from_str(t["end_time"])) for t in entries)
+
+def recurring_rules(data):
+    """``(rrule, start date, unavailable mask)`` for each entry of ``recurring``."""
+    rules = []
+    for entry in data.get("recurring", []):
+        start_date = dt.strptime(entry["start_date"], "%Y-%m-%d").date()
+        rules.append((entry["rrule"], start_date, ~available_mask_from(entry.get("times") or [entry])))
+    return rules
+
+def apply_date_changes(writer, data):
+    for specific_day in data.get("specific_days", []):
+        date_str = specific_day.get("date")
         if not date_str:
             continue
         target_date = dt.strptime(date_str, "%Y-%m-%d").date()
-        weekday_name = target_date.strftime("%A").lower()
-
-        repeating_day = Days.objects.filter(user=user, is_repeating=True, available_repeating_days__icontains=weekday_name).first()
 
-        if repeating_day:
-            day_obj, created = Days.objects.get_or_create(user=user, day=target_date, is_repeating=False)
-            if created or not day_obj.times.exists():
-                for t in repeating_day.times.all():
-                    Time.objects.create(day=day_obj, start_time=t.start_time, end_time=t.end_time)
+        if specific_day.get("unavailable", False):
+            writer.set_day(target_date, DayMask.full())
         else:
-            day_obj, created = Days.objects.get_or_create(user=user, day=target_date, is_repeating=False)
+            writer.set_day(target_date, ~available_mask_from(specific_day.get("times", [])))
 
-        day_obj.times.all().delete()
-        Time.objects.create(day=day_obj, start_time=time(0,0), end_time=time(23,59))
+    for date_str in data.get("unavailable_dates", []):
+        if not date_str:
+            continue
+        writer.set_day(dt.strptime(date_str, "%Y-%m-%d").date(), DayMask.full())
 
-    for entry in specific_unavailable:
+    for entry in data.get("specific_unavailable", []):
         date_str = entry.get("date")
         if not date_str:
             continue
         target_date = dt.strptime(date_str, "%Y-%m-%d").date()
-        weekday_name = target_date.strftime("%A").lower()
+        writer.block_day(target_date, available_mask_from(entry.get("times", [])))
 
-        repeating_day = Days.objects.filter(user=user, is_repeating=True, available_repeating_days__icontains=weekday_name).first()
+def save_timezone(user_id, data):
+    if data.get("timezone"):
+        get_zone(data["timezone"])
+        HostProfile.objects.update_or_create(user_id=user_id, defaults={"timezone": data["timezone"]})
 
-        if repeating_day:
-            day_obj, created = Days.objects.get_or_create(user=user, day=target_date, is_repeating=False)
-            if created or not day_obj.times.exists():
-                for t in repeating_day.times.all():
-                    Time.objects.create(day=day_obj, start_time=t.start_time, end_time=t.end_time)
-        else:
-            day_obj, created = Days.objects.get_or_create(
-                user=user, day=target_date, is_repeating=False
-            )
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def createSchedule(request):
+    user = request.user
+    data = request.data
+    
+    available_repeating = data.get("repeating_days", [])
 
-        apply_specific_unavailable(day_obj, entry.get("times", []))
+    all_weekdays = list(WEEKDAY_MAP.keys())
+
+    try:
+        with transaction.atomic():
+            writer = ScheduleWriter(user.id, schedule_dates(data))
+
+            if available_repeating:
+                weekday_masks = []
+                for day_name in all_weekdays:
+                    found = next((d for d in available_repeating if d["day"].lower() == day_name), None)
+                    if found:
+                        weekday_masks.append((day_name, ~available_mask_from([found])))
+                    else:
+                        weekday_masks.append(("", DayMask()))
+                writer.replace_repeating(weekday_masks)
+
+            if "recurring" in data:
+                writer.replace_rules(recurring_rules(data))
+
+            apply_date_changes(writer, data)
+            save_timezone(user.id, data)
+
+            changes = writer.flush()
+            bump_schedule_version(user.id)
+    except (KeyError, TypeError, ValueError) as e:
+        return Response({"code": 400, "error": f"Invalid schedule data: {e}"})
 
     return Response({
         "code": 200, 
         "success": True, 
-        "message": "Schedule saved successfully"
+        "message": "Schedule saved successfully",
+        "changes": changes
     })
 
 @api_view(["PATCH"])
@@ -403,81 +519,65 @@ def editSchedule(request):
     data = request.data
 
     available_repeating = data.get("repeating_days", [])
-    available_specific = data.get("specific_days", [])
-    unavailable_dates = data.get("unavailable_dates", [])
-    specific_unavailable = data.get("specific_unavailable", [])
 
     all_weekdays = list(WEEKDAY_MAP.keys())
 
-    for day_data in available_repeating:
-        day_name = day_data.get("day", "").lower()
-        if day_name not in all_weekdays:
-            continue
-
-        day_obj = Days.objects.filter( user=user, is_repeating=True, available_repeating_days__icontains=day_name).first()
-        if not day_obj:
-            day_obj = Days.objects.create(user=user, is_repeating=True, day=None, available_repeating_days=day_name)
-
-        day_obj.schedule_times.all().delete()
-        
-        start_time = time_from_str(day_data["start_time"])
-        end_time = time_from_str(day_data["end_time"])
-        intervals = calculate_unavailable_intervals([{"start": start_time, "end": end_time}])
-        for interval in intervals:
-            Time.objects.create(day=day_obj, start_time=interval["start"], end_time=interval["end"])
+    try:
+        with transaction.atomic():
+            writer = ScheduleWriter(user.id, schedule_dates(data))
 
-    for specific_day in available_specific:
-        date_str = specific_day.get("date")
-        if not date_str:
-            continue
-        target_date = dt.strptime(date_str, "%Y-%m-%d").date()
+            for day_data in available_repeating:
+                day_name = day_data.get("day", "").lower()
+                if day_name not in all_weekdays:
+                    continue
+                writer.set_repeating_day(day_name, ~available_mask_from([day_data]))
 
-        day_obj, created = Days.objects.get_or_create(user=user, day=target_date, is_repeating=False)
+            for rrule, start_date, mask in recurring_rules(data):
+                writer.add_rule(rrule, start_date, mask)
 
-        if specific_day.get("unavailable", False):
-            apply_specific_unavailable(day_obj, [{"start_time": "00:00", "end_time": "23:59"}])
-            continue
+            apply_date_changes(writer, data)
+            save_timezone(user.id, data)
 
-        new_intervals = [
-            {"start": time_from_str(t["start_time"]), "end": time_from_str(t["end_time"])}
-            for t in specific_day.get("times", [])
-        ]
+            changes = writer.flush()
+            bump_schedule_version(user.id)
+    except (KeyError, TypeError, ValueError) as e:
+        return Response({"code": 400, "error": f"Invalid schedule data: {e}"})
 
-        existing_intervals = [
-            {"start": t.start_time, "end": t.end_time} for t in day_obj.schedule_times.all()
-        ]
-        merged_intervals = merge_intervals(existing_intervals + new_intervals)
+    return Response({
+        "code": 200,
+        "success": True,
+        "message": "Schedule patched successfully",
+        "changes": changes
+    })
 
-        day_obj.schedule_times.all().delete()
-        for interval in merged_intervals:
-            Time.objects.create(day=day_obj, start_time=interval["start"], end_time=interval["end"])
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def importSchedule(request):
+    upload = request.FILES.get("file")
+    if upload is None:
+        return Response({"code": 400, "error": "Upload a CSV or ICS file as 'file'"})
 
-    for date_str in unavailable_dates:
-        if not date_str:
-            continue
-        target_date = dt.strptime(date_str, "%Y-%m-%d").date()
-        day_obj, created = Days.objects.get_or_create(user=user, day=target_date, is_repeating=False)
-        apply_specific_unavailable(day_obj, [{"start_time": "00:00", "end_time": "23:59"}])
+    kind = (request.query_params.get("type") or upload.name.rsplit(".", 1)[-1]).lower()
+    if kind not in PARSERS:
+        return Response({"code": 400, "error": "type must be csv or ics"})
 
-    for entry in specific_unavailable:
-        date_str = entry.get("date")
-        if not date_str:
-            continue
-        target_date = dt.strptime(date_str, "%Y-%m-%d").date()
-        day_obj, created = Days.objects.get_or_create(user=user, day=target_date, is_repeating=False)
-        apply_specific_unavailable(day_obj, entry.get("times", []))
+    upload.seek(0)
+    lines = io.TextIOWrapper(upload.file, encoding="utf-8-sig", errors="replace", newline="")
+    report = import_schedule(request.user.id, PARSERS[kind](lines, host_timezone(request.user.id)))
 
     return Response({
         "code": 200,
-        "success": True,
-        "message": "Schedule patched successfully"
+        "success": report.error_count == 0,
+        "message": "Schedule imported",
+        "report": report.as_dict()
     })
 
 @api_view(["DELETE"])
 @permission_classes([IsAuthenticated])
 def deleteSchedule(request):
     user = request.user
-    Days.objects.filter(user=user).delete()
+    Days.objects.filter(user_id=user.id).delete()
+    bump_schedule_version(user.id)
     return Response({
         "code": 200,
         "success": True, 